@@ -3,32 +3,392 @@ Healthcare Voice Agent - MCP
 """
 
 import asyncio
+import calendar
+import functools
+import multiprocessing
+import io
 import json
 import logging
-import tempfile
+import mmap
 import os
+import queue
 import re
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
 from dataclasses import dataclass, field
 import uuid
-import random
+import itertools
+import secrets
 import string
 
 # Core dependencies
 import requests
-import speech_recognition as sr
-from gtts import gTTS
-import pygame
-import pyttsx3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson  # Native JSON encoder for session logs and request bodies
+except ImportError:
+    orjson = None
+
+try:
+    import llmjson  # Native JSON repair for malformed LLM output
+except ImportError:
+    llmjson = None
+
+try:
+    import ahocorasick  # pyahocorasick: single-pass multi-phrase matching
+except ImportError:
+    ahocorasick = None
 
 # Enhanced logging with clear formatting
+# Per-turn diagnostics are logged at DEBUG; set LOG_LEVEL=DEBUG to see them
 logging.basicConfig(
-    level=logging.INFO,
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+def _json_default(obj: Any) -> str:
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+def _dumps(obj: Any) -> bytes:
+    """Compact JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, default=_json_default).encode('utf-8')
+
+def _loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+# Precompiled speech-processing patterns (hot path on every turn)
+_CORRECTIONS = {
+    'hernia': 'California',  # Common misrecognition
+    'gloria': 'Florida',
+    'taxes': 'Texas',
+    'organ': 'Oregon',
+    'pencil vania': 'Pennsylvania',
+    'connect i cut': 'Connecticut'
+}
+_CORRECTION_RE = re.compile(r'\b(' + '|'.join(re.escape(k) for k in _CORRECTIONS) + r')\b', re.IGNORECASE)
+
+# Protected expressions come before the bare number, so they win at the same position
+_NUMBER_TOKEN_RE = re.compile(
+    r'(?P<time>\b\d{1,2}:\d{2}\s*(?:AM|PM)\b)'   # Times
+    r'|(?P<hour>\b\d{1,2}\s*(?:AM|PM)\b)'         # Times without minutes
+    r'|(?P<med>\b\d+\s*(?:mg|ml|cc|units?)\b)'    # Medical measurements
+    r'|(?P<frac>\b\d+/\d+\b)'                    # Fractions/dates
+    r'|(?P<num>\b\d+\b)',
+    re.IGNORECASE
+)
+_DIGIT_WORDS = dict(zip('0123456789', ('zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine')))
+
+_STRIP_TABLE = str.maketrans('', '', '{}[]"|<>\\')
+# Whitespace collapse and pauses after sentence punctuation/commas in one pass
+_SPEECH_SPACING_RE = re.compile(r'(?P<punct>[.!?,])\s*|(?P<space>\s+)')
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Insurance result field extractors
+_DISCOVERY_RES = {
+    'payer': re.compile(r'(?:payer|insurance|carrier)[:\s]*([^\n,;]+)', re.IGNORECASE),
+    'member_id': re.compile(r'(?:member\s*id|policy\s*number|id)[:\s]*([A-Za-z0-9\-]+)', re.IGNORECASE),
+    'group_number': re.compile(r'(?:group\s*number|group)[:\s]*([A-Za-z0-9\-]+)', re.IGNORECASE)
+}
+_ELIG_RES = {
+    'copay': re.compile(r'(?:co-?pay|copayment)[:\s]*\$?([0-9,]+\.?[0-9]*)', re.IGNORECASE),
+    'deductible': re.compile(r'(?:deductible)[:\s]*\$?([0-9,]+\.?[0-9]*)', re.IGNORECASE),
+    'status': re.compile(r'(?:status|eligibility)[:\s]*([^\n,;]+)', re.IGNORECASE)
+}
+
+# Bounded worker pool for blocking audio and HTTP calls (instead of the unbounded default executor)
+_EXEC = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4), thread_name_prefix='va-io')
+
+def _build_http_session() -> requests.Session:
+    """Keep-alive HTTP session so repeated calls to the same host reuse TCP/TLS connections"""
+    http = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+    )
+    http.mount('https://', adapter)
+    http.mount('http://', adapter)
+    return http
+
+_RESPONSE_VALUE_RE = re.compile(r'"response":\s*"([^"]*)"')
+_TRAILING_COMMA_RE = re.compile(r',\s*([}\]])')
+
+def _repair_llm_json(text: str) -> Optional[Dict]:
+    """Recover the JSON object from malformed model output: llmjson if installed, else strip trailing commas"""
+    if llmjson is not None:
+        try:
+            repaired = llmjson.repair(text, top_k=1, deterministic_seed=0)
+            if isinstance(repaired, (list, tuple)):
+                repaired = repaired[0] if repaired else None
+            if isinstance(repaired, (str, bytes)):
+                repaired = json.loads(repaired)
+            if isinstance(repaired, dict):
+                return repaired
+        except Exception as e:
+            logger.debug(f"llmjson repair failed: {e}")
+    
+    # Without llmjson (or if it gave up) drop trailing commas from the outermost object span;
+    # the caller has already failed to parse that span as-is
+    start, end = text.find('{'), text.rfind('}')
+    if start != -1 and end > start:
+        candidate = _TRAILING_COMMA_RE.sub(r'\1', text[start:end + 1])
+        try:
+            parsed = json.loads(candidate)
+            if isinstance(parsed, dict):
+                return parsed
+        except ValueError:
+            pass
+    return None
+
+# Streaming LLM replies: locate the "response" value and sentence ends inside it
+_RESPONSE_FIELD_RE = re.compile(r'"response"\s*:\s*"')
+_SENTENCE_END_RE = re.compile(r'[.!?](?=\s)')
+
+class _StreamedResponseField:
+    """Incrementally decodes the "response" string value of a JSON reply as tokens arrive"""
+    
+    def __init__(self):
+        self.buffer = ""
+        self.text = ""
+        self.complete = False
+        self._pos = None  # Next undecoded index of the value inside buffer
+    
+    def feed(self, token: str):
+        self.buffer += token
+        if self.complete:
+            return
+        if self._pos is None:
+            match = _RESPONSE_FIELD_RE.search(self.buffer)
+            if not match:
+                return
+            self._pos = match.end()
+        
+        buf, i, chars = self.buffer, self._pos, []
+        while i < len(buf):
+            char = buf[i]
+            if char == '"':
+                self.complete = True
+                i += 1
+                break
+            if char == '\\':
+                end = i + 6 if buf.startswith('u', i + 1) else i + 2
+                if end > len(buf):
+                    break  # Escape sequence split across tokens
+                try:
+                    chars.append(json.loads('"' + buf[i:end] + '"'))
+                except ValueError:
+                    pass
+                i = end
+                continue
+            chars.append(char)
+            i += 1
+        self._pos = i
+        self.text += ''.join(chars)
+
+# Agent turn-loop patterns
+_DOB_SLASH_RE = re.compile(r'^(\d{1,2})/(\d{1,2})/(\d{4})')
+_DOB_DASH_RE = re.compile(r'^(\d{1,2})-(\d{1,2})-(\d{4})')
+_DOB_SEPARATORS_RE = re.compile(r'[,\s]+')
+_FULL_MONTH_NAMES = frozenset(name.lower() for name in calendar.month_name if name)
+
+@functools.lru_cache(maxsize=1024)
+def _normalize_dob(dob_str: str) -> Optional[str]:
+    """YYYY-MM-DD for a numeric or natural-language DOB, or None if unrecognized"""
+    # MM/DD/YYYY or MM-DD-YYYY format
+    match = _DOB_SLASH_RE.match(dob_str) or _DOB_DASH_RE.match(dob_str)
+    if match:
+        month, day, year = match.groups()
+        return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
+    
+    # Natural language (e.g., "January 15, 1990" or "Jan 15 1990"): pick the
+    # month format from the first word so only one strptime call is made
+    cleaned = _DOB_SEPARATORS_RE.sub(' ', dob_str).strip()
+    month_word = cleaned.split(' ', 1)[0].lower()
+    date_format = '%B %d %Y' if month_word in _FULL_MONTH_NAMES else '%b %d %Y'
+    try:
+        return datetime.strptime(cleaned, date_format).strftime('%Y-%m-%d')
+    except ValueError:
+        return None
+
+def format_dob_batch(dobs) -> List[str]:
+    """Normalize many DOBs (e.g. when reprocessing stored sessions); unrecognized values pass through"""
+    formatted = []
+    for dob in dobs:
+        dob_str = str(dob).strip() if dob else ""
+        formatted.append((_normalize_dob(dob_str) or dob_str) if dob_str else "")
+    return formatted
+
+_ENDING_PHRASES = (
+    'bye', 'goodbye', 'hang up', 'end call', 'thank you goodbye',
+    'that\'s all', 'we\'re done', 'finished', 'end', 'quit',
+    'cancel', 'nevermind', 'never mind'
+)
+_ENDING_RE = re.compile(r'\b(?:' + '|'.join(re.escape(p) for p in _ENDING_PHRASES) + r')\b')
+
+def _build_ending_automaton():
+    """Aho-Corasick automaton over the ending phrases, when pyahocorasick is installed"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for phrase in _ENDING_PHRASES:
+        automaton.add_word(phrase, len(phrase))
+    automaton.make_automaton()
+    return automaton
+
+_ENDING_AUTOMATON = _build_ending_automaton()
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+# Applied to lowercased API responses; each has a single capture group (its first "(")
+_PAYER_PATTERNS = (
+    r'payer[:\s]*([^\n,;]+)',
+    r'insurance[:\s]*([^\n,;]+)',
+    r'carrier[:\s]*([^\n,;]+)',
+    r'plan[:\s]*([^\n,;]+)'
+)
+_MEMBER_ID_PATTERNS = (
+    r'member\s*id[:\s]*([a-za-z0-9\-]+)',
+    r'policy\s*number[:\s]*([a-za-z0-9\-]+)',
+    r'policy\s*id[:\s]*([a-za-z0-9\-]+)',
+    r'id[:\s]*([a-za-z0-9\-]{5,})'  # At least 5 chars for ID
+)
+_FINANCIAL_PATTERNS = {
+    'copay': r'co-?pay[:\s]*\$?([0-9,]+\.?[0-9]*)',
+    'deductible': r'deductible[:\s]*\$?([0-9,]+\.?[0-9]*)',
+    'coinsurance': r'coinsurance[:\s]*([0-9]+)%?'
+}
+
+def _fuse_patterns(named_patterns) -> re.Pattern:
+    """Fuse (name, pattern) pairs into one regex whose capture groups are the names.
+
+    The alternation sits inside a lookahead, so matches are zero-width and a single
+    finditer pass still sees overlapping matches of every pattern at every position.
+    """
+    alternatives = (pattern.replace('(', f'(?P<{name}>', 1) for name, pattern in named_patterns)
+    return re.compile('(?=' + '|'.join(alternatives) + ')')
+
+_DISCOVERY_FIELDS_RE = _fuse_patterns(
+    [(f'payer_{i}', p) for i, p in enumerate(_PAYER_PATTERNS)]
+    + [(f'member_id_{i}', p) for i, p in enumerate(_MEMBER_ID_PATTERNS)]
+)
+_ELIGIBILITY_FIELDS_RE = _fuse_patterns(_FINANCIAL_PATTERNS.items())
+
+def _scan_fields(pattern: re.Pattern, text: str) -> Dict[str, str]:
+    """First match of each named group of a fused pattern, in one pass over text"""
+    found = {}
+    for match in pattern.finditer(text):
+        found.setdefault(match.lastgroup, match.group(match.lastgroup))
+    return found
+
+# Static instructions sent as a byte-identical system message every turn so the
+# provider's prefix/prompt cache can reuse it; per-turn context goes in the user message
+_SYSTEM_PROMPT = """You are an expert healthcare appointment scheduler with years of experience. You are intelligent, efficient, warm, and professional.
+
+INTELLIGENT CONVERSATION FLOW:
+1. GREETING: Professional welcome, ask for full name
+2. DATA COLLECTION: Systematically collect (one at a time, naturally):
+   - Full name → Phone number → Reason for visit → Date of birth → State
+3. INSURANCE DISCOVERY: When you have name+dob+state → trigger "discovery" API
+4. PROVIDER INFORMATION: Get provider name (no NPI needed)
+5. ELIGIBILITY CHECK: When you have discovery results+provider → trigger "eligibility" API  
+6. INSURANCE ANNOUNCEMENT: Clearly announce payer name, policy ID, co-pay from API results
+7. APPOINTMENT SCHEDULING: Get preferred date → preferred time
+8. CONFIRMATION: Generate 5-digit alphanumeric confirmation code and confirm details
+9. PROFESSIONAL CLOSING: Thank patient and end call
+
+INTELLIGENT BEHAVIOR RULES:
+- NEVER ask for information you already have - always check CURRENT SESSION DATA first
+- Be naturally conversational, not robotic or repetitive
+- Handle multiple pieces of information if user provides them together
+- Stay focused on the healthcare appointment flow
+- Be confident and move the conversation forward efficiently
+- For dates, convert to YYYY-MM-DD format for API calls
+- For unclear speech, ask for clarification in a helpful way
+
+SPEECH RECOGNITION AWARENESS:
+- If user input seems garbled or doesn't make sense, politely ask them to repeat
+- For state names, be aware of common misrecognitions (California/hernia, Florida/gloria)
+- For dates, confirm in different format if unclear
+- Always validate critical information like dates and names
+
+TECHNICAL REQUIREMENTS:
+- Respond ONLY with valid JSON format
+- Use "discovery" or "eligibility" for api_call field (never "none" unless truly no API needed)
+- Generate 5-digit alphanumeric confirmation codes for final booking
+- Set done=true only when appointment is fully confirmed with confirmation code
+
+REQUIRED JSON RESPONSE FORMAT:
+{
+    "response": "your warm, professional response to the patient",
+    "extract": {"field_name": "extracted_value"},
+    "api_call": "discovery|eligibility|none",
+    "api_data": {relevant data for API call},
+    "done": false
+}
+
+Remember: You are the expert. Be confident, intelligent, and guide the conversation smoothly to completion."""
+
+# Conversation turns quoted verbatim in the LLM prompt; older ones are summarized
+PROMPT_RECENT_TURNS = 6
+
+# Max patients whose discovery results are memoized per MCP client
+DISCOVERY_CACHE_SIZE = 256
+
+# Canned replies, rotated in order rather than sampled
+_FALLBACK_RESPONSES = (
+    "I understand. Could you please repeat that more clearly?",
+    "I want to make sure I got that right. Could you say that again?",
+    "Let me make sure I understand you correctly. Please repeat that.",
+    "I'm sorry, could you rephrase that for me?"
+)
+_SPEECH_ISSUE_RESPONSES = {
+    "TIMEOUT": (
+        "I didn't hear anything. Please try speaking again.",
+        "I'm still here. Could you please speak up?",
+        "I'm waiting for your response. Please try again."
+    ),
+    "UNCLEAR": (
+        "I couldn't understand that clearly. Could you please speak more slowly?",
+        "I'm having trouble understanding. Could you repeat that?",
+        "Could you please speak a bit more clearly for me?"
+    ),
+    "NETWORK_ERROR": (
+        "I'm having a connection issue. Please try again in a moment.",
+        "There's a network issue. Let me try again.",
+        "I'm having trouble with my speech recognition. Please repeat."
+    ),
+    "ERROR": (
+        "I had a technical issue. Could you please try again?",
+        "Sorry, I had a problem. Please repeat that.",
+        "I encountered an error. Could you say that again?"
+    ),
+}
+
+CONFIRMATION_CODE_ALPHABET = string.ascii_uppercase + string.digits
+CONFIRMATION_CODE_LENGTH = 5
+
+# In-memory cap for conversation/api_calls; older entries live only in the JSONL sidecars
+MAX_IN_MEMORY_ENTRIES = 200
+SESSIONS_DIR = "sessions"
+
+# Fields that make up an appointment request, in collection order
+REQUIRED_FIELDS = ('name', 'phone', 'reason', 'date_of_birth', 'state', 'provider_name', 'preferred_date', 'preferred_time')
+_REQUIRED_FIELD_SET = frozenset(REQUIRED_FIELDS)
+CONFIRMATION_FIELDS = frozenset({'name', 'preferred_date'})
+# Patient identity sent to discovery; a change invalidates any result fetched with the old values
+_DISCOVERY_IDENTITY_FIELDS = ('name', 'date_of_birth', 'state')
+
 @dataclass
 class Session:
     """Enhanced session container with intelligent data management"""
@@ -37,39 +397,100 @@ class Session:
     end_time: Optional[datetime] = None
     
     data: Dict[str, Any] = field(default_factory=dict)
-    conversation: List[Dict] = field(default_factory=list)
-    api_calls: List[Dict] = field(default_factory=list)
+    # Bounded in memory; the full logs live in the JSONL sidecars
+    conversation: Deque[Dict] = field(default_factory=lambda: deque(maxlen=MAX_IN_MEMORY_ENTRIES))
+    api_calls: Deque[Dict] = field(default_factory=lambda: deque(maxlen=MAX_IN_MEMORY_ENTRIES))
+    
+    # Running totals (in-memory lists are capped) and lazily opened append-only sidecars
+    total_turns: int = 0
+    total_api_calls: int = 0
+    _conv_fp: Any = field(default=None, init=False, repr=False)
+    _api_fp: Any = field(default=None, init=False, repr=False)
+    # Required fields still empty; kept current by update_data
+    missing_fields: set = field(default_factory=set, init=False, repr=False)
+    
+    def __post_init__(self):
+        self.missing_fields = {name for name in REQUIRED_FIELDS if not self.data.get(name)}
+    
+    @property
+    def session_dir(self) -> str:
+        return os.path.join(SESSIONS_DIR, self.session_id)
+    
+    def _open_sidecar(self, name: str):
+        """Open a per-session JSONL sidecar in unbuffered binary append mode (one write per entry)"""
+        os.makedirs(self.session_dir, exist_ok=True)
+        return open(os.path.join(self.session_dir, name), 'ab', buffering=0)
+    
+    @staticmethod
+    def _append_line(fp, entry: Dict):
+        fp.write(_dumps(entry) + b'\n')
     
     def add_message(self, role: str, message: str):
         """Add message with enhanced metadata"""
-        self.conversation.append({
-            "timestamp": datetime.now().isoformat(),
+        self.total_turns += 1
+        entry = {
+            "timestamp": datetime.now(),
             "role": role,
             "message": message,
-            "turn_number": len(self.conversation) + 1
-        })
+            "turn_number": self.total_turns
+        }
+        try:
+            if self._conv_fp is None:
+                self._conv_fp = self._open_sidecar("conv.jsonl")
+            self._append_line(self._conv_fp, entry)
+        except Exception as e:
+            logger.error(f"Conversation log append failed: {e}")
+        
+        self.conversation.append(entry)
     
     def add_api_call(self, api_type: str, request_data: Dict, response_data: Dict, success: bool):
         """Track API calls for debugging and analytics"""
-        self.api_calls.append({
-            "timestamp": datetime.now().isoformat(),
+        self.total_api_calls += 1
+        entry = {
+            "timestamp": datetime.now(),
             "api_type": api_type,
             "request": request_data,
             "response": response_data,
             "success": success,
-            "duration_ms": getattr(self, '_last_api_duration', 0)
-        })
+            "duration_ms": round(response_data.get("duration_seconds", 0) * 1000)
+        }
+        try:
+            if self._api_fp is None:
+                self._api_fp = self._open_sidecar("api_calls.jsonl")
+            self._append_line(self._api_fp, entry)
+        except Exception as e:
+            logger.error(f"API call log append failed: {e}")
+        
+        self.api_calls.append(entry)
+    
+    def update_data(self, values: Dict[str, Any]):
+        """Merge extracted values into data, tracking which required fields are still empty"""
+        self.data.update(values)
+        for name in values.keys() & _REQUIRED_FIELD_SET:
+            if self.data.get(name):
+                self.missing_fields.discard(name)
+            else:
+                self.missing_fields.add(name)
     
     def get_completion_percentage(self) -> float:
         """Calculate conversation completion percentage"""
-        required_fields = ['name', 'phone', 'reason', 'date_of_birth', 'state', 'provider_name', 'preferred_date', 'preferred_time']
-        completed = sum(1 for field in required_fields if self.data.get(field))
-        return (completed / len(required_fields)) * 100
+        return (len(REQUIRED_FIELDS) - len(self.missing_fields)) / len(REQUIRED_FIELDS) * 100
+    
+    def close(self):
+        """Close the JSONL sidecar files"""
+        for attr in ('_conv_fp', '_api_fp'):
+            fp = getattr(self, attr)
+            if fp is not None:
+                try:
+                    fp.close()
+                except Exception as e:
+                    logger.warning(f"Session log close issue: {e}")
+                setattr(self, attr, None)
     
     def save(self) -> str:
-        """Enhanced session save with comprehensive data"""
+        """Write compact session metadata; messages and API calls are already in the JSONL sidecars"""
         try:
-            os.makedirs("sessions", exist_ok=True)
+            os.makedirs(self.session_dir, exist_ok=True)
             
             end_time = self.end_time or datetime.now()
             duration = (end_time - self.start_time).total_seconds()
@@ -77,65 +498,237 @@ class Session:
             session_data = {
                 "metadata": {
                     "session_id": self.session_id,
-                    "start_time": self.start_time.isoformat(),
-                    "end_time": end_time.isoformat(),
+                    "start_time": self.start_time,
+                    "end_time": end_time,
                     "duration_seconds": duration,
                     "duration_minutes": round(duration / 60, 2),
                     "completion_percentage": self.get_completion_percentage(),
-                    "total_turns": len(self.conversation),
-                    "api_calls_made": len(self.api_calls)
+                    "total_turns": self.total_turns,
+                    "api_calls_made": self.total_api_calls,
+                    "conversation_log": "conv.jsonl",
+                    "api_call_log": "api_calls.jsonl"
                 },
-                "patient_data": self.data,
-                "conversation_history": self.conversation,
-                "api_call_log": self.api_calls,
-                "raw_responses": {
-                    "discovery_raw": self.data.get('discovery_raw', ''),
-                    "eligibility_raw": self.data.get('eligibility_raw', '')
-                }
+                "patient_data": self.data
             }
             
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"sessions/healthcare_session_{timestamp}_{self.session_id[:8]}.json"
+            filename = os.path.join(self.session_dir, "metadata.json")
             
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(session_data, f, indent=2, ensure_ascii=False)
+            # Write-then-rename so a crash never leaves a truncated metadata file
+            tmp_filename = filename + ".tmp"
+            fd = os.open(tmp_filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.write(fd, _dumps(session_data))
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            os.replace(tmp_filename, filename)
             
             print(f"\n💾 SESSION SAVED: {os.path.abspath(filename)}")
-            print(f"📊 Completion: {self.get_completion_percentage():.1f}% | Turns: {len(self.conversation)} | APIs: {len(self.api_calls)}")
+            print(f"📊 Completion: {self.get_completion_percentage():.1f}% | Turns: {self.total_turns} | APIs: {self.total_api_calls}")
             return filename
         except Exception as e:
             logger.error(f"Session save failed: {e}")
             return ""
+        finally:
+            if self.end_time:
+                self.close()
+    
+    @staticmethod
+    def _iter_jsonl(path: str) -> Iterator[Dict]:
+        """Yield entries from a memory-mapped JSONL sidecar one line at a time"""
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b''):
+                if line.strip():
+                    yield _loads(line)
+    
+    @classmethod
+    def iter_messages(cls, session_id: str) -> Iterator[Dict]:
+        """Stream a saved session's full conversation without loading it into memory"""
+        return cls._iter_jsonl(os.path.join(SESSIONS_DIR, session_id, "conv.jsonl"))
+    
+    @classmethod
+    def iter_api_calls(cls, session_id: str) -> Iterator[Dict]:
+        """Stream a saved session's full API call log without loading it into memory"""
+        return cls._iter_jsonl(os.path.join(SESSIONS_DIR, session_id, "api_calls.jsonl"))
+    
+    @classmethod
+    def load_mmap(cls, path: str) -> "Session":
+        """Load a legacy single-file session JSON incrementally (requires ijson)"""
+        import ijson  # Optional: only needed for transcripts saved before the JSONL sidecars
+        
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            def _first(prefix: str, default):
+                mm.seek(0)
+                return next(ijson.items(mm, prefix, use_float=True), default)
+            
+            def _tail(prefix: str) -> Deque[Dict]:
+                mm.seek(0)
+                return deque(ijson.items(mm, prefix, use_float=True), maxlen=MAX_IN_MEMORY_ENTRIES)
+            
+            metadata = _first('metadata', {})
+            session = cls(
+                session_id=metadata.get("session_id", str(uuid.uuid4())),
+                start_time=datetime.fromisoformat(metadata["start_time"]) if metadata.get("start_time") else datetime.now(),
+                end_time=datetime.fromisoformat(metadata["end_time"]) if metadata.get("end_time") else None,
+                data=_first('patient_data', {}),
+                total_turns=metadata.get("total_turns", 0),
+                total_api_calls=metadata.get("api_calls_made", 0)
+            )
+            session.conversation = _tail('conversation_history.item')
+            session.api_calls = _tail('api_call_log.item')
+        return session
+    
+    @classmethod
+    def load(cls, session_id: str) -> "Session":
+        """Rebuild a session from its metadata and JSONL sidecars"""
+        session_dir = os.path.join(SESSIONS_DIR, session_id)
+        with open(os.path.join(session_dir, "metadata.json"), 'rb') as f:
+            saved = _loads(f.read())
+        
+        metadata = saved.get("metadata", {})
+        session = cls(
+            session_id=session_id,
+            start_time=datetime.fromisoformat(metadata["start_time"]),
+            end_time=datetime.fromisoformat(metadata["end_time"]) if metadata.get("end_time") else None,
+            data=saved.get("patient_data", {}),
+            total_turns=metadata.get("total_turns", 0),
+            total_api_calls=metadata.get("api_calls_made", 0)
+        )
+        session.conversation.extend(cls.iter_messages(session_id))
+        session.api_calls.extend(cls.iter_api_calls(session_id))
+        return session
+
+def _configure_system_voice(engine):
+    """Configure TTS for optimal healthcare communication"""
+    try:
+        engine.setProperty('rate', 165)  # Optimal for healthcare communication
+        voices = engine.getProperty('voices')
+        if voices:
+            # Prefer female voice for healthcare (research shows higher trust)
+            for voice in voices:
+                if 'female' in voice.name.lower() or 'woman' in voice.name.lower():
+                    engine.setProperty('voice', voice.id)
+                    break
+    except Exception as e:
+        logger.warning(f"TTS configuration issue: {e}")
+
+def _system_tts_worker(texts, done):
+    """Long-lived system TTS process: initializes the driver once, then speaks queued text"""
+    # The first message on done reports driver startup so the parent never waits on a dead worker
+    try:
+        import pyttsx3
+        engine = pyttsx3.init()
+        _configure_system_voice(engine)
+    except Exception as e:
+        done.put(f"System TTS unavailable: {e}")
+        return
+    done.put(None)
+    while True:
+        text = texts.get()
+        if text is None:
+            break
+        try:
+            engine.say(text)
+            engine.runAndWait()
+            done.put(None)
+        except Exception as e:
+            done.put(str(e))
 
 class Audio:
     """ -grade audio system with intelligent speech processing"""
     
     def __init__(self):
         print("🎤 Initializing advanced audio system...")
-        self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        # Audio stacks are imported here so API-only users of this module skip SDL/driver startup
+        import speech_recognition as sr
+        import pygame
+        from gtts import gTTS
+        self._sr = sr
+        self._pygame = pygame
+        self._gTTS = gTTS
+        
+        self.recognizer = self._sr.Recognizer()
+        self.microphone = self._sr.Microphone()
         
         # Initialize audio systems
-        pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
-        self.tts = pyttsx3.init()
-        self._configure_tts()
+        self._pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
+        # System TTS fallback runs in its own process, started on first use
+        self._tts_process = None
+        self._tts_texts = None
+        self._tts_done = None
+        self._tts_unavailable = None
+        # Synthesizes the next sentence while the current one is playing
+        self._tts_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='tts')
+        self._asr = self._load_local_asr()
         self._calibrate_microphone()
         
         print("✅ Audio system ready with intelligent processing")
     
-    def _configure_tts(self):
-        """Configure TTS for optimal healthcare communication"""
+    def _speak_with_system_tts(self, text: str):
+        """Speak through the persistent system TTS worker, starting it if needed"""
+        if self._tts_unavailable:
+            # Driver startup already failed once; don't respawn a worker on every fallback
+            raise RuntimeError(self._tts_unavailable)
+        if self._tts_process is None or not self._tts_process.is_alive():
+            self._tts_texts = multiprocessing.Queue()
+            self._tts_done = multiprocessing.Queue()
+            self._tts_process = multiprocessing.Process(
+                target=_system_tts_worker,
+                args=(self._tts_texts, self._tts_done),
+                daemon=True
+            )
+            self._tts_process.start()
+            error = self._wait_for_tts(timeout=30)
+            if error:
+                self._tts_unavailable = error
+                raise RuntimeError(error)
+        
+        self._tts_texts.put(text)
+        error = self._wait_for_tts(timeout=120)
+        if error:
+            raise RuntimeError(error)
+    
+    def _wait_for_tts(self, timeout: float) -> Optional[str]:
+        """Next result from the TTS worker, failing fast if the process has exited"""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self._tts_done.get(timeout=0.5)
+            except queue.Empty:
+                if not self._tts_process.is_alive():
+                    # The worker may have reported just before exiting
+                    try:
+                        return self._tts_done.get_nowait()
+                    except queue.Empty:
+                        return "System TTS worker exited unexpectedly"
+                if time.monotonic() >= deadline:
+                    return "System TTS timed out"
+    
+    def _load_local_asr(self):
+        """Load a local faster-whisper model once; None keeps Google recognition"""
         try:
-            self.tts.setProperty('rate', 165)  # Optimal for healthcare communication
-            voices = self.tts.getProperty('voices')
-            if voices:
-                # Prefer female voice for healthcare (research shows higher trust)
-                for voice in voices:
-                    if 'female' in voice.name.lower() or 'woman' in voice.name.lower():
-                        self.tts.setProperty('voice', voice.id)
-                        break
+            from faster_whisper import WhisperModel
+        except ImportError:
+            print("⚠️  faster-whisper not available, using Google speech recognition")
+            return None
+        
+        model_name = os.getenv('WHISPER_MODEL', 'base.en')
+        try:
+            # int8 quantization keeps CPU inference fast enough for conversational turns
+            model = WhisperModel(model_name, device='cpu', compute_type='int8')
+            print(f"✅ LOCAL ASR READY: whisper {model_name}")
+            return model
         except Exception as e:
-            logger.warning(f"TTS configuration issue: {e}")
+            logger.warning(f"Local ASR unavailable ({e}), using Google speech recognition")
+            return None
+    
+    def _transcribe_locally(self, audio) -> str:
+        """Transcribe captured audio with the local Whisper model"""
+        wav = io.BytesIO(audio.get_wav_data(convert_rate=16000))
+        segments, _ = self._asr.transcribe(wav, language='en', beam_size=1, vad_filter=True)
+        return ' '.join(segment.text.strip() for segment in segments).strip()
     
     def _calibrate_microphone(self):
         """Advanced microphone calibration with environment adaptation"""
@@ -167,7 +760,15 @@ class Audio:
                         phrase_time_limit=10  # Allow for detailed responses
                     )
                 
-                print("🧠 PROCESSING: Analyzing speech with AI...")
+                
+                # Local recognition avoids the cloud round-trip entirely
+                if self._asr is not None:
+                    result = self._transcribe_locally(audio)
+                    if not result:
+                        logger.debug("ASR: no speech recognized")
+                        return "UNCLEAR"
+                    logger.debug("ASR recognized (local): %r", result)
+                    return self._intelligent_post_process(result)
                 
                 # Primary recognition attempt
                 try:
@@ -176,12 +777,11 @@ class Audio:
                         language='en-US',
                         show_all=False
                     )
-                    confidence = "HIGH"
-                    print(f"🎯 RECOGNIZED ({confidence}): '{result}'")
+                    logger.debug("ASR recognized: %r", result)
                     return self._intelligent_post_process(result)
                     
-                except sr.UnknownValueError:
-                    print("🤔 UNCLEAR: Attempting enhanced recognition...")
+                except self._sr.UnknownValueError:
+                    logger.debug("ASR unclear, retrying with alternatives")
                     # Secondary attempt with different parameters
                     try:
                         alternatives = self.recognizer.recognize_google(
@@ -191,26 +791,24 @@ class Audio:
                         )
                         if alternatives and 'alternative' in alternatives:
                             best_match = alternatives['alternative'][0]['transcript']
-                            print(f"🎯 RECOGNIZED (secondary): '{best_match}'")
+                            logger.debug("ASR recognized (secondary): %r", best_match)
                             return self._intelligent_post_process(best_match)
                     except:
                         pass
                     return "UNCLEAR"
                     
-                except sr.RequestError as e:
+                except self._sr.RequestError as e:
                     logger.error(f"Speech service error: {e}")
                     return "NETWORK_ERROR"
                     
-            except sr.WaitTimeoutError:
-                print("⏰ TIMEOUT: No speech detected")
+            except self._sr.WaitTimeoutError:
+                logger.debug("ASR timeout: no speech detected")
                 return "TIMEOUT"
             except Exception as e:
                 logger.error(f"Listen error: {e}")
                 return "ERROR"
         
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(None, _listen_with_intelligence)
-        return result
+        return await asyncio.get_running_loop().run_in_executor(_EXEC, _listen_with_intelligence)
     
     def _intelligent_post_process(self, text: str) -> str:
         """AI-powered post-processing of speech recognition"""
@@ -220,179 +818,248 @@ class Audio:
         # Clean and normalize
         cleaned = ' '.join(text.split()).strip()
         
-        # Healthcare-specific corrections
-        healthcare_corrections = {
-            'hernia': 'California',  # Common misrecognition
-            'gloria': 'Florida',
-            'taxes': 'Texas',
-            'organ': 'Oregon',
-            'pencil vania': 'Pennsylvania',
-            'connect i cut': 'Connecticut'
-        }
-        
-        for incorrect, correct in healthcare_corrections.items():
-            cleaned = re.sub(r'\b' + re.escape(incorrect) + r'\b', correct, cleaned, flags=re.IGNORECASE)
+        # Healthcare-specific corrections in a single pass
+        cleaned = _CORRECTION_RE.sub(lambda m: _CORRECTIONS[m.group(1).lower()], cleaned)
         
         return cleaned
     
     def convert_numbers_to_digits(self, text: str) -> str:
         """Intelligent number conversion preserving medical context"""
-        # Protect time expressions and medical measurements
-        protected_patterns = [
-            r'\b\d{1,2}:\d{2}\s*(?:AM|PM|am|pm)\b',  # Times
-            r'\b\d{1,2}\s*(?:AM|PM|am|pm)\b',        # Times without minutes
-            r'\b\d+\s*(?:mg|ml|cc|units?)\b',        # Medical measurements
-            r'\b\d+/\d+\b'                           # Fractions/dates
-        ]
-        
-        protected_ranges = []
-        for pattern in protected_patterns:
-            for match in re.finditer(pattern, text, re.IGNORECASE):
-                protected_ranges.append((match.start(), match.end()))
-        
-        def replace_number(match):
-            start, end = match.span()
-            # Check if number is in protected range
-            for p_start, p_end in protected_ranges:
-                if start >= p_start and end <= p_end:
-                    return match.group()
-            
-            number = match.group()
-            digit_words = {
-                '0': 'zero', '1': 'one', '2': 'two', '3': 'three', '4': 'four',
-                '5': 'five', '6': 'six', '7': 'seven', '8': 'eight', '9': 'nine'
-            }
-            return ' '.join(digit_words.get(digit, digit) for digit in number)
-        
-        # Convert standalone numbers to digit pronunciation
-        result = re.sub(r'\b\d+\b', replace_number, text)
-        return result
+        # Times and medical measurements are matched as whole tokens and left untouched
+        return _NUMBER_TOKEN_RE.sub(self._speak_number, text)
+    
+    @staticmethod
+    def _speak_number(match) -> str:
+        """Convert standalone numbers to digit pronunciation"""
+        if match.lastgroup != 'num':
+            return match.group()
+        return ' '.join(_DIGIT_WORDS.get(digit, digit) for digit in match.group())
     
     async def speak(self, text: str):
         """Intelligent TTS with healthcare optimization"""
         if not text:
             return
         
-        print(f"🗣️  SPEAKING: {text}")
+        logger.debug("Speaking: %s", text)
         
         # Prepare text for optimal speech
         speech_text = self.convert_numbers_to_digits(text)
         speech_text = self._optimize_for_speech(speech_text)
         
         def _speak_intelligently():
+            # Split into sentences so playback starts after the first one is synthesized
+            chunks = [c for c in _SENTENCE_SPLIT_RE.split(speech_text) if c.strip()] or [speech_text]
+            futures = [self._tts_pool.submit(self._synthesize_chunk, chunk) for chunk in chunks]
+            played = 0
             try:
-                # Primary TTS using Google (higher quality)
-                tts = gTTS(text=speech_text, lang='en', slow=False, tld='com')
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as tmp:
-                    tts.save(tmp.name)
-                    pygame.mixer.music.load(tmp.name)
-                    pygame.mixer.music.play()
-                    
-                    while pygame.mixer.music.get_busy():
-                        pygame.time.wait(50)  # Faster polling for responsiveness
+                # Primary TTS using Google (higher quality), played in order as chunks land
+                for future in futures:
+                    # Decode straight from memory; no temp file round-trip
+                    self._pygame.mixer.music.load(future.result(), 'mp3')
+                    self._pygame.mixer.music.play()
                     
-                    os.unlink(tmp.name)
+                    while self._pygame.mixer.music.get_busy():
+                        self._pygame.time.wait(20)  # Faster polling for responsiveness
+                    played += 1
                     
             except Exception as e:
                 logger.warning(f"Primary TTS failed: {e}, using fallback")
+                for pending in futures[played + 1:]:
+                    pending.cancel()
                 try:
-                    # Fallback to system TTS
-                    self.tts.say(speech_text)
-                    self.tts.runAndWait()
+                    # Fallback to system TTS for whatever has not been played yet
+                    self._speak_with_system_tts(' '.join(chunks[played:]))
                 except Exception as e2:
                     logger.error(f"All TTS methods failed: {e2}")
         
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, _speak_intelligently)
+        await asyncio.get_running_loop().run_in_executor(_EXEC, _speak_intelligently)
+    
+    def _synthesize_chunk(self, chunk: str) -> io.BytesIO:
+        """Synthesize one sentence into an in-memory MP3 buffer"""
+        tts = self._gTTS(text=chunk, lang='en', slow=False, tld='com')
+        buf = io.BytesIO()
+        tts.write_to_fp(buf)
+        buf.seek(0)
+        return buf
+    
+    @staticmethod
+    def _speech_spacing(match) -> str:
+        if match.lastgroup == 'punct':
+            return match.group('punct') + ' '
+        return ' '
     
     def _optimize_for_speech(self, text: str) -> str:
         """Optimize text for natural speech delivery"""
         # Remove problematic characters
-        cleaned = re.sub(r'[{}[\]"|<>\\]', '', text)
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+        cleaned = text.translate(_STRIP_TABLE)
         
-        # Add natural pauses for better comprehension
-        cleaned = re.sub(r'([.!?])\s*', r'\1 ', cleaned)  # Pause after sentences
-        cleaned = re.sub(r'(,)\s*', r'\1 ', cleaned)      # Pause after commas
+        # Collapse whitespace and add natural pauses after sentences and commas
+        cleaned = _SPEECH_SPACING_RE.sub(self._speech_spacing, cleaned).strip()
         
         return cleaned
     
     def cleanup(self):
         """Cleanup audio resources"""
         try:
-            pygame.mixer.quit()
-            if hasattr(self.tts, 'stop'):
-                self.tts.stop()
+            self._tts_pool.shutdown(wait=False, cancel_futures=True)
+            self._pygame.mixer.quit()
+            if self._tts_process is not None and self._tts_process.is_alive():
+                self._tts_texts.put(None)
+                self._tts_process.join(timeout=2)
         except Exception as e:
             logger.warning(f"Audio cleanup issue: {e}")
 
+class _BatchCoalescer:
+    """Collects MCP requests arriving within a short window and sends them as one JSON-RPC batch"""
+    
+    def __init__(self, send: Callable[[Any], Any], window_seconds: float, max_batch: int = 8):
+        self._send = send
+        self._window = window_seconds
+        self._max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Flushes run alongside collection; strong refs keep them from being garbage collected
+        self._inflight: Set[asyncio.Task] = set()
+    
+    async def submit(self, payload: Dict) -> Any:
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        self._queue.put_nowait((payload, future))
+        return await future
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._window
+            while len(batch) < self._max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            task = loop.create_task(self._flush(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+    
+    async def _flush(self, batch: List[Tuple[Dict, asyncio.Future]]):
+        # A lone request goes out unwrapped so servers without batch support still work
+        body = batch[0][0] if len(batch) == 1 else [payload for payload, _ in batch]
+        if len(batch) > 1:
+            logger.debug("MCP batch: coalesced %d requests", len(batch))
+        try:
+            response = await asyncio.get_running_loop().run_in_executor(_EXEC, self._send, body)
+        except Exception as e:
+            response = {"error": "REQUEST_ERROR", "message": str(e)}
+        
+        by_id = None
+        if len(batch) > 1 and isinstance(response, list):
+            by_id = {item.get("id"): item for item in response if isinstance(item, dict)}
+        
+        for payload, future in batch:
+            if future.done():
+                continue
+            if by_id is None:
+                future.set_result(response)
+            else:
+                future.set_result(by_id.get(
+                    payload["id"],
+                    {"error": "BATCH_ERROR", "message": "No response for request id in batch"}
+                ))
+    
+    def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+
 class MCPInsuranceAPI:
     """  MCP client with intelligent error handling and logging"""
     
-    def __init__(self, mcp_url: str, api_key: str):
+    def __init__(self, mcp_url: str, api_key: str, batch_window_ms: int = 0,
+                 http: Optional[requests.Session] = None):
         self.mcp_url = mcp_url
         self.api_key = api_key
         self.headers = {
             "Content-Type": "application/json",
             "X-INF-API-KEY": api_key
         }
+        # Connection pool, possibly shared with other clients; credentials go per request
+        self._owns_session = http is None
+        self._session = http if http is not None else _build_http_session()
+        # Successful discovery results keyed by patient identity (LRU)
+        self._discovery_cache: "OrderedDict[Tuple[str, str, str, str], Dict]" = OrderedDict()
+        # Optional JSON-RPC batching of concurrent calls (server must accept batch arrays)
+        self._coalescer = _BatchCoalescer(self._post, batch_window_ms / 1000) if batch_window_ms > 0 else None
         
         print(f"🔗 MCP CLIENT INITIALIZED: {mcp_url}")
         print(f"🔑 API Key: {api_key[:8]}...{api_key[-4:] if len(api_key) > 12 else '***'}")
+        if self._coalescer:
+            print(f"📦 Batching window: {batch_window_ms}ms")
+    
+    def _post(self, body: Any) -> Any:
+        """POST a JSON-RPC request (or batch) and map transport failures to error dicts"""
+        try:
+            response = self._session.post(
+                self.mcp_url, 
+                data=_dumps(body), 
+                headers=self.headers,
+                timeout=45  # Longer timeout for insurance APIs
+            )
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.Timeout:
+            return {"error": "REQUEST_TIMEOUT", "message": "Insurance API call timed out"}
+        except requests.exceptions.ConnectionError:
+            return {"error": "CONNECTION_ERROR", "message": "Could not connect to insurance API"}
+        except requests.exceptions.HTTPError as e:
+            return {"error": "HTTP_ERROR", "message": f"HTTP {e.response.status_code}: {e.response.text}"}
+        except Exception as e:
+            return {"error": "REQUEST_ERROR", "message": str(e)}
     
     async def call_insurance_api(self, api_type: str, patient_data: Dict) -> Dict:
         """Intelligent MCP API call with comprehensive logging"""
-        start_time = datetime.now()
+        t0 = time.perf_counter_ns()
+        
+        logger.debug("MCP %s call: patient=%s dob=%s state=%s", api_type,
+                     patient_data.get('name', 'Unknown'), patient_data.get('dob', 'Not provided'),
+                     patient_data.get('state', 'Not provided'))
         
-        print(f"\n🚀 MCP API CALL INITIATED")
-        print(f"📋 Type: {api_type.upper()}")
-        print(f"👤 Patient: {patient_data.get('name', 'Unknown')}")
-        print(f"🎂 DOB: {patient_data.get('dob', 'Not provided')}")
-        print(f"📍 State: {patient_data.get('state', 'Not provided')}")
+        # Discovery is deterministic per patient identity, so reuse earlier results
+        cache_key = self._discovery_cache_key(patient_data) if api_type == "discovery" else None
+        if cache_key in self._discovery_cache:
+            self._discovery_cache.move_to_end(cache_key)
+            logger.debug("MCP cache hit: reusing discovery result")
+            return {**self._discovery_cache[cache_key], "cached": True, "duration_seconds": 0.0}
         
         try:
             # Construct intelligent MCP payload
             payload = self._construct_mcp_payload(api_type, patient_data)
             
-            print(f"📤 MCP PAYLOAD:")
-            print(json.dumps(payload, indent=2))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("MCP payload: %s", _dumps(payload).decode())
             
             # Execute API call
-            def _execute_request():
-                try:
-                    response = requests.post(
-                        self.mcp_url, 
-                        headers=self.headers, 
-                        json=payload, 
-                        timeout=45  # Longer timeout for insurance APIs
-                    )
-                    response.raise_for_status()
-                    return response.json()
-                except requests.exceptions.Timeout:
-                    return {"error": "REQUEST_TIMEOUT", "message": "Insurance API call timed out"}
-                except requests.exceptions.ConnectionError:
-                    return {"error": "CONNECTION_ERROR", "message": "Could not connect to insurance API"}
-                except requests.exceptions.HTTPError as e:
-                    return {"error": "HTTP_ERROR", "message": f"HTTP {e.response.status_code}: {e.response.text}"}
-                except Exception as e:
-                    return {"error": "REQUEST_ERROR", "message": str(e)}
-            
-            loop = asyncio.get_event_loop()
-            raw_response = await loop.run_in_executor(None, _execute_request)
+            if self._coalescer is not None:
+                raw_response = await self._coalescer.submit(payload)
+            else:
+                raw_response = await asyncio.get_running_loop().run_in_executor(_EXEC, self._post, payload)
             
             # Calculate duration
-            duration = (datetime.now() - start_time).total_seconds()
+            duration = (time.perf_counter_ns() - t0) / 1e9
             
-            print(f"📥 MCP RESPONSE RECEIVED ({duration:.2f}s):")
-            print(json.dumps(raw_response, indent=2))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("MCP response (%.2fs): %s", duration, _dumps(raw_response).decode())
             
             # Process response intelligently
             if "error" in raw_response:
-                print(f"❌ MCP API ERROR: {raw_response['error']}")
                 error_msg = raw_response.get("message", "Unknown error")
                 if "code" in raw_response:
-                    print(f"🔢 Error Code: {raw_response['code']}")
                     error_msg = f"Code {raw_response['code']}: {error_msg}"
+                logger.warning(f"MCP API error {raw_response['error']}: {error_msg}")
                 return {
                     "success": False,
                     "error": raw_response["error"],
@@ -403,19 +1070,23 @@ class MCPInsuranceAPI:
             # Extract result from MCP response
             if "result" in raw_response:
                 result_data = raw_response["result"]
-                print(f"✅ MCP API SUCCESS: Data received")
                 
                 # Intelligent result processing
                 processed_result = self._process_insurance_result(api_type, result_data)
                 
-                return {
+                result = {
                     "success": True,
                     "data": processed_result,
                     "raw_response": str(result_data),
                     "duration_seconds": duration
                 }
+                if cache_key is not None:
+                    self._discovery_cache[cache_key] = result
+                    if len(self._discovery_cache) > DISCOVERY_CACHE_SIZE:
+                        self._discovery_cache.popitem(last=False)
+                return result
             else:
-                print(f"⚠️  MCP API WARNING: No result field in response")
+                logger.warning("MCP response missing result field")
                 return {
                     "success": False,
                     "error": "NO_RESULT",
@@ -424,9 +1095,8 @@ class MCPInsuranceAPI:
                 }
                 
         except Exception as e:
-            duration = (datetime.now() - start_time).total_seconds()
+            duration = (time.perf_counter_ns() - t0) / 1e9
             logger.error(f"MCP API call failed: {e}")
-            print(f"💥 MCP API EXCEPTION: {str(e)}")
             
             return {
                 "success": False,
@@ -435,12 +1105,27 @@ class MCPInsuranceAPI:
                 "duration_seconds": duration
             }
     
+    def close(self):
+        """Release pooled HTTP connections"""
+        if self._coalescer is not None:
+            self._coalescer.close()
+        if self._owns_session:
+            self._session.close()
+    
+    def _discovery_cache_key(self, patient_data: Dict) -> Tuple[str, str, str, str]:
+        first_name, last_name = self._patient_name_parts(patient_data)
+        return (
+            first_name.lower(),
+            last_name.lower(),
+            str(patient_data.get('dob', '')),
+            str(patient_data.get('state', '')).lower()
+        )
+    
     def _construct_mcp_payload(self, api_type: str, patient_data: Dict) -> Dict:
         """Construct MCP payload with required structured parameters"""
         
         # Parse patient name into first and last
-        patient_name = patient_data.get('name', '')
-        first_name, last_name = self._parse_patient_name(patient_name)
+        first_name, last_name = self._patient_name_parts(patient_data)
         
         # Base parameters required by MCP
         base_params = {
@@ -461,24 +1146,25 @@ class MCPInsuranceAPI:
         
         payload = {
             "jsonrpc": "2.0",
-            "id": f"{api_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            "id": f"{api_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}",
             "method": "tools/call",
             "params": base_params
         }
         
-        print(f"🎯 MCP STRUCTURED PARAMETERS:")
-        print(f"   Patient First Name: {first_name}")
-        print(f"   Patient Last Name: {last_name}")
-        print(f"   DOB: {patient_data.get('dob', '')}")
-        print(f"   State: {patient_data.get('state', '')}")
-        if api_type == "eligibility":
-            print(f"   Member ID: {patient_data.get('member_id', '')}")
-            print(f"   Payer: {patient_data.get('payer', '')}")
-            print(f"   Provider: {patient_data.get('provider_name', '')}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("MCP structured parameters: %s", _dumps(base_params).decode())
         
         return payload
     
-    def _parse_patient_name(self, full_name: str) -> tuple:
+    def _patient_name_parts(self, patient_data: Dict) -> tuple:
+        """First/last name, preferring the split already cached on the session"""
+        if patient_data.get('first_name'):
+            return patient_data['first_name'], patient_data.get('last_name', '')
+        return self._parse_patient_name(patient_data.get('name', ''))
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _parse_patient_name(full_name: str) -> tuple:
         """Intelligently parse full name into first and last name"""
         if not full_name:
             return "", ""
@@ -501,94 +1187,90 @@ class MCPInsuranceAPI:
         """Intelligently process insurance API results"""
         result_str = str(result_data)
         
-        if api_type == "discovery":
-            print(f"🔍 PROCESSING DISCOVERY RESULT:")
-            # Extract key information for discovery
-            patterns = {
-                'payer': r'(?:payer|insurance|carrier)[:\s]*([^\n,;]+)',
-                'member_id': r'(?:member\s*id|policy\s*number|id)[:\s]*([A-Za-z0-9\-]+)',
-                'group_number': r'(?:group\s*number|group)[:\s]*([A-Za-z0-9\-]+)'
-            }
-            
-            extracted = {}
-            for key, pattern in patterns.items():
-                match = re.search(pattern, result_str, re.IGNORECASE)
-                if match:
-                    extracted[key] = match.group(1).strip()
-                    print(f"  ✅ {key.upper()}: {extracted[key]}")
-            
-        elif api_type == "eligibility":
-            print(f"✅ PROCESSING ELIGIBILITY RESULT:")
-            # Extract key information for eligibility
-            patterns = {
-                'copay': r'(?:co-?pay|copayment)[:\s]*\$?([0-9,]+\.?[0-9]*)',
-                'deductible': r'(?:deductible)[:\s]*\$?([0-9,]+\.?[0-9]*)',
-                'status': r'(?:status|eligibility)[:\s]*([^\n,;]+)'
-            }
-            
+        # The highlights are only logged, so skip the scans unless debugging
+        patterns = _DISCOVERY_RES if api_type == "discovery" else _ELIG_RES if api_type == "eligibility" else None
+        if patterns and logger.isEnabledFor(logging.DEBUG):
             extracted = {}
             for key, pattern in patterns.items():
-                match = re.search(pattern, result_str, re.IGNORECASE)
+                match = pattern.search(result_str)
                 if match:
                     extracted[key] = match.group(1).strip()
-                    print(f"  ✅ {key.upper()}: {extracted[key]}")
+            logger.debug("%s result highlights: %s", api_type, extracted)
         
         return result_str
 
 class IntelligentLLM:
     """Advanced LLM client with healthcare expertise and intelligent conversation management"""
     
-    def __init__(self, jwt_token: str, endpoint_url: str, project_id: str, connection_id: str):
+    def __init__(self, jwt_token: str, endpoint_url: str, project_id: str, connection_id: str,
+                 streaming: bool = False, http: Optional[requests.Session] = None):
         self.jwt_token = jwt_token
         self.endpoint_url = endpoint_url
         self.project_id = project_id
         self.connection_id = connection_id
+        self.streaming = streaming
         self.headers = {
             'Content-Type': 'application/json',
             'Authorization': f'Bearer {jwt_token}'
         }
+        self._owns_session = http is None
+        self._session = http if http is not None else _build_http_session()
+        self._fallback_cycle = itertools.cycle(_FALLBACK_RESPONSES)
         
         print(f"🧠 INTELLIGENT LLM INITIALIZED")
         print(f"🔗 Endpoint: {endpoint_url}")
         print(f"📁 Project: {project_id}")
         print(f"🔌 Connection: {connection_id}")
+        print(f"📡 Streaming: {'Enabled' if streaming else 'Disabled'}")
+    
+    def _build_payload(self, context: str, stream: bool = False) -> Dict:
+        """Build the chat completion payload: static system prefix + per-turn context"""
+        payload = {
+            "messages": [
+                {"role": "system", "content": _SYSTEM_PROMPT},
+                {"role": "user", "content": context}
+            ],
+            "project_id": self.project_id,
+            "connection_id": self.connection_id,
+            "max_tokens": 500,  # Increased for more detailed responses
+            "temperature": 0.2,  # Lower for more consistent healthcare responses
+            "top_p": 0.9
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+    
+    @staticmethod
+    def _extract_content(raw_response: Dict) -> str:
+        """Pull the completion text out of a chat response body"""
+        if 'choices' in raw_response and raw_response['choices']:
+            return raw_response['choices'][0]['message']['content']
+        return raw_response.get('response', '')
     
     async def process_conversation(self, user_input: str, session: Session, api_results: Dict = None) -> Dict:
         """Intelligent conversation processing with healthcare expertise"""
         
-        print(f"\n🧠 LLM PROCESSING INITIATED")
-        print(f"👤 User Input: '{user_input}'")
+        logger.debug("LLM request for input: %r", user_input)
         
         # Display current session intelligence
-        self._display_session_intelligence(session)
+        if logger.isEnabledFor(logging.DEBUG):
+            self._display_session_intelligence(session)
         
         # Construct intelligent healthcare prompt
         prompt = self._construct_healthcare_prompt(user_input, session, api_results)
         
         try:
-            messages = [
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": user_input}
-            ]
+            payload = self._build_payload(prompt)
             
-            payload = {
-                "messages": messages,
-                "project_id": self.project_id,
-                "connection_id": self.connection_id,
-                "max_tokens": 500,  # Increased for more detailed responses
-                "temperature": 0.2,  # Lower for more consistent healthcare responses
-                "top_p": 0.9
-            }
-            
-            print(f"📤 LLM REQUEST PAYLOAD:")
-            print(json.dumps({k: v for k, v in payload.items() if k != 'messages'}, indent=2))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("LLM request params: %s", _dumps({k: v for k, v in payload.items() if k != 'messages'}).decode())
             
             def _execute_llm_request():
                 try:
-                    response = requests.post(
+                    response = self._session.post(
                         self.endpoint_url, 
-                        headers=self.headers, 
-                        json=payload, 
+                        data=_dumps(payload), 
+                        headers=self.headers,
                         timeout=30
                     )
                     response.raise_for_status()
@@ -597,48 +1279,140 @@ class IntelligentLLM:
                     logger.error(f"LLM request failed: {e}")
                     return {"error": str(e)}
             
-            loop = asyncio.get_event_loop()
-            raw_response = await loop.run_in_executor(None, _execute_llm_request)
+            raw_response = await asyncio.get_running_loop().run_in_executor(_EXEC, _execute_llm_request)
             
-            print(f"📥 LLM RAW RESPONSE:")
-            print(json.dumps(raw_response, indent=2))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("LLM raw response: %s", _dumps(raw_response).decode())
             
             if "error" in raw_response:
-                print(f"❌ LLM ERROR: {raw_response['error']}")
+                logger.warning(f"LLM error: {raw_response['error']}")
                 return self._create_fallback_response(user_input)
             
             # Extract LLM response
-            if 'choices' in raw_response and raw_response['choices']:
-                llm_content = raw_response['choices'][0]['message']['content']
-            else:
-                llm_content = raw_response.get('response', '')
+            llm_content = self._extract_content(raw_response)
             
-            print(f"🧠 LLM RESPONSE CONTENT: {llm_content}")
+            logger.debug("LLM response content: %s", llm_content)
             
             if llm_content:
                 parsed_response = self._parse_llm_response(llm_content)
-                print(f"✅ LLM PARSING SUCCESS:")
-                print(json.dumps(parsed_response, indent=2))
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("LLM parsed response: %s", _dumps(parsed_response).decode())
                 return parsed_response
             else:
-                print(f"⚠️  LLM WARNING: Empty response")
+                logger.warning("LLM returned an empty response")
                 return self._create_fallback_response(user_input)
                 
         except Exception as e:
             logger.error(f"LLM processing error: {e}")
-            print(f"💥 LLM EXCEPTION: {str(e)}")
             return self._create_fallback_response(user_input)
     
+    async def stream_conversation(self, user_input: str, session: Session,
+                                  on_sentence: Callable[[str], Any], api_results: Dict = None) -> Dict:
+        """Stream the LLM reply (SSE) and hand each completed sentence of its response to on_sentence"""
+        
+        logger.debug("LLM streaming request for input: %r", user_input)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            self._display_session_intelligence(session)
+        
+        prompt = self._construct_healthcare_prompt(user_input, session, api_results)
+        payload = self._build_payload(prompt, stream=True)
+        
+        loop = asyncio.get_running_loop()
+        lines: asyncio.Queue = asyncio.Queue()
+        
+        def _stream_llm_request():
+            try:
+                with self._session.post(self.endpoint_url, data=_dumps(payload), headers=self.headers,
+                                        timeout=30, stream=True) as response:
+                    response.raise_for_status()
+                    for line in response.iter_lines(decode_unicode=True):
+                        loop.call_soon_threadsafe(lines.put_nowait, line)
+            except Exception as e:
+                loop.call_soon_threadsafe(lines.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(lines.put_nowait, None)
+        
+        reader = loop.run_in_executor(_EXEC, _stream_llm_request)
+        field = _StreamedResponseField()
+        plain_body = []  # Endpoint answered without SSE framing
+        spoken = 0
+        error = None
+        
+        while True:
+            line = await lines.get()
+            if line is None:
+                break
+            if isinstance(line, Exception):
+                error = line
+                continue
+            if not line.startswith('data:'):
+                plain_body.append(line)
+                continue
+            data = line[5:].strip()
+            if not data or data == '[DONE]':
+                continue
+            try:
+                choices = _loads(data).get('choices') or [{}]
+                token = (choices[0].get('delta') or {}).get('content') or ''
+            except ValueError:
+                continue
+            
+            field.feed(token)
+            ends = [m.end() for m in _SENTENCE_END_RE.finditer(field.text, spoken)]
+            if ends:
+                on_sentence(field.text[spoken:ends[-1]].strip())
+                spoken = ends[-1]
+        await reader
+        
+        if error is not None:
+            logger.error(f"LLM stream failed: {error}")
+            if not spoken:
+                return self._create_fallback_response(user_input)
+        
+        llm_content = field.buffer
+        if not llm_content and plain_body:
+            try:
+                llm_content = self._extract_content(_loads('\n'.join(plain_body)))
+            except ValueError:
+                llm_content = ''
+            field.feed(llm_content)
+        
+        logger.debug("LLM response content: %s", llm_content)
+        
+        if not llm_content:
+            logger.warning("LLM returned an empty response")
+            return self._create_fallback_response(user_input)
+        
+        parsed_response = self._parse_llm_response(llm_content)
+        
+        # Speak whatever trails the last sentence boundary
+        if parsed_response["response"] == field.text.strip():
+            remainder = field.text[spoken:].strip()
+            if remainder:
+                on_sentence(remainder)
+            parsed_response["spoken"] = True
+        else:
+            parsed_response["spoken"] = spoken > 0
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("LLM parsed response: %s", _dumps(parsed_response).decode())
+        return parsed_response
+    
+    def close(self):
+        """Release pooled HTTP connections"""
+        if self._owns_session:
+            self._session.close()
+    
     def _display_session_intelligence(self, session: Session):
         """Display intelligent session analysis"""
-        required_fields = ['name', 'phone', 'reason', 'date_of_birth', 'state', 'provider_name', 'preferred_date', 'preferred_time']
-        collected = [field for field in required_fields if session.data.get(field)]
+        collected = [name for name in REQUIRED_FIELDS if name not in session.missing_fields]
         
         print(f"\n📊 SESSION INTELLIGENCE ANALYSIS")
-        print(f"🎯 Completion: {len(collected)}/{len(required_fields)} ({session.get_completion_percentage():.1f}%)")
+        print(f"🎯 Completion: {len(collected)}/{len(REQUIRED_FIELDS)} ({session.get_completion_percentage():.1f}%)")
         print(f"✅ Collected: {', '.join(collected) if collected else 'None yet'}")
         
-        missing = [field for field in required_fields if not session.data.get(field)]
+        missing = [name for name in REQUIRED_FIELDS if name in session.missing_fields]
         if missing:
             print(f"⏳ Required: {', '.join(missing)}")
         
@@ -653,7 +1427,7 @@ class IntelligentLLM:
         print("-" * 60)
     
     def _construct_healthcare_prompt(self, user_input: str, session: Session, api_results: Dict = None) -> str:
-        """Construct intelligent healthcare conversation prompt"""
+        """Construct the per-turn context; the static instructions live in _SYSTEM_PROMPT"""
         
         # API context if available
         api_context = ""
@@ -668,71 +1442,60 @@ API RESULTS RECEIVED - ANNOUNCE THESE KEY DETAILS:
 API Response Data: {api_results.get('data', '')}
 """
         
-        prompt = f"""You are an expert healthcare appointment scheduler with years of experience. You are intelligent, efficient, warm, and professional.
-
-CURRENT SESSION DATA: {json.dumps(session.data, indent=2)}
-RECENT CONVERSATION: {json.dumps(session.conversation[-4:] if session.conversation else [], indent=2)}
-USER INPUT: "{user_input}"{api_context}
-
-INTELLIGENT CONVERSATION FLOW:
-1. GREETING: Professional welcome, ask for full name
-2. DATA COLLECTION: Systematically collect (one at a time, naturally):
-   - Full name → Phone number → Reason for visit → Date of birth → State
-3. INSURANCE DISCOVERY: When you have name+dob+state → trigger "discovery" API
-4. PROVIDER INFORMATION: Get provider name (no NPI needed)
-5. ELIGIBILITY CHECK: When you have discovery results+provider → trigger "eligibility" API  
-6. INSURANCE ANNOUNCEMENT: Clearly announce payer name, policy ID, co-pay from API results
-7. APPOINTMENT SCHEDULING: Get preferred date → preferred time
-8. CONFIRMATION: Generate 5-digit alphanumeric confirmation code and confirm details
-9. PROFESSIONAL CLOSING: Thank patient and end call
-
-INTELLIGENT BEHAVIOR RULES:
-- NEVER ask for information you already have - always check CURRENT SESSION DATA first
-- Be naturally conversational, not robotic or repetitive
-- Handle multiple pieces of information if user provides them together
-- Stay focused on the healthcare appointment flow
-- Be confident and move the conversation forward efficiently
-- For dates, convert to YYYY-MM-DD format for API calls
-- For unclear speech, ask for clarification in a helpful way
-
-SPEECH RECOGNITION AWARENESS:
-- If user input seems garbled or doesn't make sense, politely ask them to repeat
-- For state names, be aware of common misrecognitions (California/hernia, Florida/gloria)
-- For dates, confirm in different format if unclear
-- Always validate critical information like dates and names
-
-TECHNICAL REQUIREMENTS:
-- Respond ONLY with valid JSON format
-- Use "discovery" or "eligibility" for api_call field (never "none" unless truly no API needed)
-- Generate 5-digit alphanumeric confirmation codes for final booking
-- Set done=true only when appointment is fully confirmed with confirmation code
-
-REQUIRED JSON RESPONSE FORMAT:
-{{
-    "response": "your warm, professional response to the patient",
-    "extract": {{"field_name": "extracted_value"}},
-    "api_call": "discovery|eligibility|none",
-    "api_data": {{relevant data for API call}},
-    "done": false
-}}
-
-Remember: You are the expert. Be confident, intelligent, and guide the conversation smoothly to completion."""
+        prompt = f"""CURRENT SESSION DATA: {_dumps(self._prompt_view(session.data)).decode()}
+{self._prompt_history(session)}
+USER INPUT: "{user_input}"{api_context}"""
         
         return prompt
     
+    def _prompt_view(self, data: Dict) -> Dict:
+        """Session data for the prompt: raw API blobs dropped, API results reduced to their outcome"""
+        view = {}
+        for key, value in data.items():
+            if key.endswith('_raw'):
+                continue
+            if key.endswith('_result') and isinstance(value, dict):
+                value = {k: value[k] for k in ('success', 'error', 'cached') if k in value}
+            view[key] = value
+        return view
+    
+    def _prompt_history(self, session: Session) -> str:
+        """Last few turns verbatim, with older turns collapsed to a one-line summary"""
+        latest_first = itertools.islice(reversed(session.conversation), PROMPT_RECENT_TURNS)
+        recent = [{"role": entry["role"], "message": entry["message"]} for entry in latest_first][::-1]
+        history = f"RECENT CONVERSATION: {_dumps(recent).decode()}"
+        older = session.total_turns - len(recent)
+        if older > 0:
+            history = f"EARLIER CONVERSATION: {older} earlier messages, already captured in CURRENT SESSION DATA\n{history}"
+        return history
+    
     def _parse_llm_response(self, response_text: str) -> Dict:
         """Intelligently parse LLM response with error recovery"""
         try:
-            # Clean the response
-            content = response_text.strip()
-            if content.startswith('```json'):
-                content = content[7:]
-            if content.endswith('```'):
-                content = content[:-3]
-            content = content.strip()
+            # Slice the outermost object; drops code fences and any chatter around it
+            start = response_text.find('{')
+            end = response_text.rfind('}')
+            content = response_text[start:end + 1] if start != -1 and end > start else response_text
             
-            # Parse JSON
-            parsed = json.loads(content)
+            # Parse JSON, repairing malformed output instead of dropping its structured fields
+            try:
+                parsed = _loads(content)
+            except json.JSONDecodeError as e:  # orjson.JSONDecodeError subclasses it
+                logger.warning(f"LLM JSON parse error: {e}")
+                parsed = _repair_llm_json(response_text)
+                if parsed is None:
+                    # Last resort: salvage just the spoken response
+                    response_match = _RESPONSE_VALUE_RE.search(response_text)
+                    if response_match:
+                        return {
+                            "response": response_match.group(1),
+                            "extract": {},
+                            "api_call": "none",
+                            "api_data": {},
+                            "done": False
+                        }
+                    return self._create_fallback_response(response_text)
+                logger.debug("LLM JSON repaired")
             
             # Validate and enhance
             result = {
@@ -749,42 +1512,19 @@ Remember: You are the expert. Be confident, intelligent, and guide the conversat
             
             # Validate API call types
             if result["api_call"] not in ["discovery", "eligibility", "none"]:
-                print(f"⚠️  Invalid API call type: {result['api_call']}, defaulting to 'none'")
+                logger.warning(f"Invalid API call type: {result['api_call']}, defaulting to 'none'")
                 result["api_call"] = "none"
             
             return result
-            
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON PARSE ERROR: {e}")
-            # Try to extract response with regex
-            response_match = re.search(r'"response":\s*"([^"]*)"', response_text)
-            if response_match:
-                return {
-                    "response": response_match.group(1),
-                    "extract": {},
-                    "api_call": "none",
-                    "api_data": {},
-                    "done": False
-                }
-            
-            # Ultimate fallback
-            return self._create_fallback_response(response_text)
         
         except Exception as e:
-            print(f"❌ PARSE EXCEPTION: {e}")
+            logger.error(f"LLM response parse error: {e}")
             return self._create_fallback_response(response_text)
     
     def _create_fallback_response(self, user_input: str) -> Dict:
         """Create intelligent fallback response"""
-        fallback_responses = [
-            "I understand. Could you please repeat that more clearly?",
-            "I want to make sure I got that right. Could you say that again?",
-            "Let me make sure I understand you correctly. Please repeat that.",
-            "I'm sorry, could you rephrase that for me?"
-        ]
-        
         return {
-            "response": random.choice(fallback_responses),
+            "response": next(self._fallback_cycle),
             "extract": {},
             "api_call": "none",
             "api_data": {},
@@ -795,15 +1535,23 @@ class HealthcareVoiceAgent:
     """  Healthcare Voice Agent with maximum AI intelligence"""
     
     def __init__(self, jwt_token: str, endpoint_url: str, project_id: str, connection_id: str,
-                 mcp_url: str, insurance_api_key: str):
+                 mcp_url: str, insurance_api_key: str, llm_streaming: bool = True,
+                 mcp_batch_window_ms: int = 0):
         
         print("🏥 HEALTHCARE VOICE AGENT -   INITIALIZATION")
         print("=" * 60)
         
         self.session = Session()
         self.audio = Audio()
-        self.llm = IntelligentLLM(jwt_token, endpoint_url, project_id, connection_id)
-        self.mcp_api = MCPInsuranceAPI(mcp_url, insurance_api_key)
+        # One keep-alive pool for both the LLM and MCP endpoints
+        self._http = _build_http_session()
+        self.llm = IntelligentLLM(jwt_token, endpoint_url, project_id, connection_id,
+                                  streaming=llm_streaming, http=self._http)
+        self.mcp_api = MCPInsuranceAPI(mcp_url, insurance_api_key, batch_window_ms=mcp_batch_window_ms,
+                                       http=self._http)
+        self._speech_issue_cycles = {
+            issue: itertools.cycle(responses) for issue, responses in _SPEECH_ISSUE_RESPONSES.items()
+        }
         
         print(f"✅ AGENT READY - Session ID: {self.session.session_id}")
         print("=" * 60)
@@ -814,46 +1562,12 @@ class HealthcareVoiceAgent:
             return ""
         
         dob_str = str(dob_input).strip()
-        print(f"🎂 FORMATTING DOB: '{dob_str}'")
-        
-        # MM/DD/YYYY format
-        if re.match(r'^\d{1,2}/\d{1,2}/\d{4}', dob_str):
-            parts = dob_str.split('/')
-            month, day, year = parts[0], parts[1], parts[2]
-            formatted = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-            print(f"✅ DOB FORMATTED: {dob_str} → {formatted}")
-            return formatted
-        
-        # MM-DD-YYYY format
-        if re.match(r'^\d{1,2}-\d{1,2}-\d{4}', dob_str):
-            parts = dob_str.split('-')
-            month, day, year = parts[0], parts[1], parts[2]
-            formatted = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-            print(f"✅ DOB FORMATTED: {dob_str} → {formatted}")
-            return formatted
-        
-        # Natural language (e.g., "January 15, 1990")
-        try:
-            # Handle various natural formats
-            cleaned = re.sub(r'[,\s]+', ' ', dob_str).strip()
-            parsed = datetime.strptime(cleaned, '%B %d %Y')
-            formatted = parsed.strftime('%Y-%m-%d')
-            print(f"✅ DOB FORMATTED: {dob_str} → {formatted}")
-            return formatted
-        except ValueError:
-            pass
-        
-        try:
-            # Try short month format
-            cleaned = re.sub(r'[,\s]+', ' ', dob_str).strip()
-            parsed = datetime.strptime(cleaned, '%b %d %Y')
-            formatted = parsed.strftime('%Y-%m-%d')
-            print(f"✅ DOB FORMATTED: {dob_str} → {formatted}")
+        formatted = _normalize_dob(dob_str)
+        if formatted:
+            logger.debug("DOB formatted: %s -> %s", dob_str, formatted)
             return formatted
-        except ValueError:
-            pass
         
-        print(f"⚠️  DOB FORMAT UNCLEAR: Using as-is: {dob_str}")
+        logger.warning(f"DOB format unclear, using as-is: {dob_str}")
         return dob_str
     
     async def start_intelligent_conversation(self):
@@ -903,56 +1617,80 @@ class HealthcareVoiceAgent:
                         await self._end_conversation("User requested to end")
                         break
                     
-                    # Process with intelligent LLM
-                    llm_result = await self.llm.process_conversation(user_input, self.session)
+                    # Process with intelligent LLM, prefetching discovery concurrently when its inputs are known
+                    prefetched_discovery = None
+                    if self._should_prefetch_discovery():
+                        logger.debug("Prefetching discovery alongside the LLM")
+                        llm_result, prefetched_discovery = await asyncio.gather(
+                            self._run_llm_turn(user_input),
+                            self._execute_intelligent_api_call("discovery", {})
+                        )
+                    else:
+                        llm_result = await self._run_llm_turn(user_input)
                     
                     # Update session data intelligently
-                    if llm_result.get("extract"):
-                        old_data = dict(self.session.data)
-                        self.session.data.update(llm_result["extract"])
-                        new_fields = [k for k in llm_result["extract"].keys() if k not in old_data or old_data[k] != llm_result["extract"][k]]
-                        if new_fields:
-                            print(f"📝 DATA UPDATED: {new_fields}")
+                    extract = llm_result.get("extract") or {}
+                    # Diff against the live dict instead of copying all of session.data
+                    new_fields = [k for k, v in extract.items() if k not in self.session.data or self.session.data[k] != v]
+                    if new_fields:
+                        self.session.update_data(extract)
+                        if 'name' in new_fields:
+                            # Split once per name change; MCP payloads and prompts reuse it
+                            first_name, last_name = MCPInsuranceAPI._parse_patient_name(self.session.data['name'] or '')
+                            self.session.data['first_name'] = first_name
+                            self.session.data['last_name'] = last_name
+                        logger.debug("Session data updated: %s", new_fields)
                     
                     # Handle intelligent API calls
                     api_results = None
-                    if llm_result.get("api_call") != "none":
-                        api_results = await self._execute_intelligent_api_call(
-                            llm_result["api_call"], 
-                            llm_result.get("api_data", {})
-                        )
-                        
-                        # Process API results with LLM
-                        if api_results and api_results.get("success"):
-                            print("📢 PROCESSING API RESULTS WITH LLM...")
-                            api_announcement = await self.llm.process_conversation(
-                                "ANNOUNCE_API_RESULTS", 
-                                self.session, 
-                                api_results
-                            )
-                            
-                            if api_announcement.get("response"):
-                                api_response = api_announcement["response"]
-                                print(f"🏥 AGENT (API Results): {api_response}")
-                                await self.audio.speak(api_response)
-                                self.session.add_message("assistant", api_response)
+                    api_call = llm_result.get("api_call", "none")
+                    api_data = llm_result.get("api_data") or {}
+                    if prefetched_discovery is not None and (api_data or any(
+                            key in new_fields for key in _DISCOVERY_IDENTITY_FIELDS)):
+                        # This turn corrected the identity the prefetch was sent with
+                        logger.debug("Discarding prefetched discovery for outdated patient identity")
+                        prefetched_discovery = None
+                        if api_call in ("discovery", "none"):
+                            api_call = "discovery"
+                        else:
+                            self.session.data.pop('discovery_result', None)
+                            self.session.data.pop('discovery_raw', None)
+                    if prefetched_discovery is not None and api_call in ("discovery", "none"):
+                        api_results = prefetched_discovery
+                    elif api_call != "none":
+                        api_results = await self._execute_intelligent_api_call(api_call, api_data)
+                    
+                    # Phrase the API results with the LLM while the main response is being spoken
+                    announce_task = None
+                    if api_results and api_results.get("success"):
+                        announce_task = asyncio.create_task(self.llm.process_conversation(
+                            "ANNOUNCE_API_RESULTS", 
+                            self.session, 
+                            api_results
+                        ))
                     
                     # Deliver main response
                     main_response = llm_result.get("response", "")
                     if main_response:
                         print(f"🏥 AGENT: {main_response}")
-                        await self.audio.speak(main_response)
+                        if not llm_result.get("spoken"):
+                            await self.audio.speak(main_response)
                         self.session.add_message("assistant", main_response)
                     
+                    if announce_task is not None:
+                        api_announcement = await announce_task
+                        if api_announcement.get("response"):
+                            api_response = api_announcement["response"]
+                            print(f"🏥 AGENT (API Results): {api_response}")
+                            await self.audio.speak(api_response)
+                            self.session.add_message("assistant", api_response)
+                    
                     # Check for conversation completion
                     if llm_result.get("done", False):
                         print("✅ CONVERSATION COMPLETED BY LLM")
                         await self._end_conversation("Completed successfully")
                         break
                     
-                    # Brief pause for natural conversation flow
-                    await asyncio.sleep(0.5)
-                    
                 except Exception as e:
                     consecutive_errors += 1
                     logger.error(f"Turn {turn_number} error: {e}")
@@ -972,67 +1710,78 @@ class HealthcareVoiceAgent:
         finally:
             self._cleanup_resources()
     
+    async def _run_llm_turn(self, user_input: str) -> Dict:
+        """Run the LLM for a turn; when streaming, reply sentences are spoken as they arrive"""
+        if not self.llm.streaming:
+            return await self.llm.process_conversation(user_input, self.session)
+        
+        sentences: asyncio.Queue = asyncio.Queue()
+        
+        async def _speak_sentences():
+            while True:
+                sentence = await sentences.get()
+                if sentence is None:
+                    break
+                await self.audio.speak(sentence)
+        
+        speaker = asyncio.create_task(_speak_sentences())
+        try:
+            return await self.llm.stream_conversation(user_input, self.session, sentences.put_nowait)
+        finally:
+            sentences.put_nowait(None)
+            await speaker
+    
     async def _handle_speech_issue(self, issue_type: str, consecutive_count: int) -> str:
         """Intelligently handle speech recognition issues"""
         
-        print(f"🎧 SPEECH ISSUE: {issue_type} (consecutive: {consecutive_count})")
-        
-        if issue_type == "TIMEOUT":
-            responses = [
-                "I didn't hear anything. Please try speaking again.",
-                "I'm still here. Could you please speak up?",
-                "I'm waiting for your response. Please try again."
-            ]
-        elif issue_type == "UNCLEAR":
-            responses = [
-                "I couldn't understand that clearly. Could you please speak more slowly?",
-                "I'm having trouble understanding. Could you repeat that?",
-                "Could you please speak a bit more clearly for me?"
-            ]
-        elif issue_type == "NETWORK_ERROR":
-            responses = [
-                "I'm having a connection issue. Please try again in a moment.",
-                "There's a network issue. Let me try again.",
-                "I'm having trouble with my speech recognition. Please repeat."
-            ]
-        else:  # ERROR
-            responses = [
-                "I had a technical issue. Could you please try again?",
-                "Sorry, I had a problem. Please repeat that.",
-                "I encountered an error. Could you say that again?"
-            ]
+        logger.debug("Speech issue: %s (consecutive: %d)", issue_type, consecutive_count)
+        
+        cycle = self._speech_issue_cycles.get(issue_type, self._speech_issue_cycles["ERROR"])
+        response = next(cycle)
         
         # Escalate concern with consecutive errors
         if consecutive_count >= 2:
-            return f"{random.choice(responses)} If you continue to have issues, you may want to call back later."
+            return f"{response} If you continue to have issues, you may want to call back later."
         
-        return random.choice(responses)
+        return response
+    
+    def _should_prefetch_discovery(self) -> bool:
+        """Discovery can run alongside the LLM once name, DOB and state are known and it has not run yet"""
+        data = self.session.data
+        return all(data.get(key) for key in _DISCOVERY_IDENTITY_FIELDS) and 'discovery_result' not in data
     
     def _is_conversation_ending(self, user_input: str) -> bool:
         """Intelligently detect conversation ending signals"""
-        ending_phrases = [
-            'bye', 'goodbye', 'hang up', 'end call', 'thank you goodbye',
-            'that\'s all', 'we\'re done', 'finished', 'end', 'quit',
-            'cancel', 'nevermind', 'never mind'
-        ]
-        
-        user_lower = user_input.lower().strip()
-        return any(phrase in user_lower for phrase in ending_phrases)
+        user_lower = user_input.lower()
+        if _ENDING_AUTOMATON is None:
+            return bool(_ENDING_RE.search(user_lower))
+        
+        # One automaton pass; keep the whole-word semantics of the regex fallback
+        for end, length in _ENDING_AUTOMATON.iter(user_lower):
+            start = end - length + 1
+            if (start == 0 or not _is_word_char(user_lower[start - 1])) and \
+               (end + 1 == len(user_lower) or not _is_word_char(user_lower[end + 1])):
+                return True
+        return False
     
     async def _execute_intelligent_api_call(self, api_type: str, api_data: Dict) -> Dict:
         """Execute intelligent API call with comprehensive data"""
         
-        print(f"🚀 EXECUTING INTELLIGENT API CALL: {api_type.upper()}")
+        logger.debug("Executing %s API call", api_type)
         
         # Prepare comprehensive call data
         call_data = {**self.session.data, **api_data}
+        if 'name' in api_data and 'first_name' not in api_data:
+            # The session's cached split belongs to a different name
+            call_data.pop('first_name', None)
+            call_data.pop('last_name', None)
         
         # Intelligent DOB formatting
         if 'date_of_birth' in call_data:
             call_data['dob'] = self._format_dob_for_api(call_data['date_of_birth'])
         
         # Execute the API call
-        start_time = datetime.now()
+        t0 = time.perf_counter_ns()
         result = await self.mcp_api.call_insurance_api(api_type, call_data)
         
         # Store comprehensive results
@@ -1046,69 +1795,48 @@ class HealthcareVoiceAgent:
             # Intelligent data extraction from API response
             self._extract_api_intelligence(api_type, result.get("data", ""))
         
-        duration = (datetime.now() - start_time).total_seconds()
-        status = "✅ SUCCESS" if result.get("success") else "❌ FAILED"
-        print(f"{status} - {api_type.upper()} API completed in {duration:.2f}s")
+        duration_ms = (time.perf_counter_ns() - t0) / 1e6
+        logger.info("%s API %s in %.0fms", api_type, "succeeded" if result.get("success") else "failed", duration_ms)
         
         return result
     
     def _extract_api_intelligence(self, api_type: str, api_response: str):
         """Intelligently extract structured data from API responses"""
         
-        print(f"🧠 EXTRACTING INTELLIGENCE FROM {api_type.upper()} RESPONSE")
-        
         if not api_response:
             return
         
         response_lower = api_response.lower()
         
         if api_type == "discovery":
-            # Extract payer information
-            payer_patterns = [
-                r'payer[:\s]*([^\n,;]+)',
-                r'insurance[:\s]*([^\n,;]+)',
-                r'carrier[:\s]*([^\n,;]+)',
-                r'plan[:\s]*([^\n,;]+)'
-            ]
+            found = _scan_fields(_DISCOVERY_FIELDS_RE, response_lower)
             
-            for pattern in payer_patterns:
-                match = re.search(pattern, response_lower)
-                if match and not self.session.data.get('payer'):
-                    payer = match.group(1).strip().title()
-                    self.session.data['payer'] = payer
-                    print(f"🏢 EXTRACTED PAYER: {payer}")
-                    break
+            # Extract payer information (earlier patterns take priority)
+            if not self.session.data.get('payer'):
+                for i in range(len(_PAYER_PATTERNS)):
+                    value = found.get(f'payer_{i}')
+                    if value is not None:
+                        payer = value.strip().title()
+                        self.session.data['payer'] = payer
+                        logger.debug("Extracted payer: %s", payer)
+                        break
             
             # Extract member/policy ID
-            id_patterns = [
-                r'member\s*id[:\s]*([a-za-z0-9\-]+)',
-                r'policy\s*number[:\s]*([a-za-z0-9\-]+)',
-                r'policy\s*id[:\s]*([a-za-z0-9\-]+)',
-                r'id[:\s]*([a-za-z0-9\-]{5,})'  # At least 5 chars for ID
-            ]
-            
-            for pattern in id_patterns:
-                match = re.search(pattern, response_lower)
-                if match and not self.session.data.get('member_id'):
-                    member_id = match.group(1).strip().upper()
-                    self.session.data['member_id'] = member_id
-                    print(f"🆔 EXTRACTED MEMBER ID: {member_id}")
-                    break
+            if not self.session.data.get('member_id'):
+                for i in range(len(_MEMBER_ID_PATTERNS)):
+                    value = found.get(f'member_id_{i}')
+                    if value is not None:
+                        member_id = value.strip().upper()
+                        self.session.data['member_id'] = member_id
+                        logger.debug("Extracted member ID: %s", member_id)
+                        break
         
         elif api_type == "eligibility":
             # Extract financial information
-            financial_patterns = {
-                'copay': r'co-?pay[:\s]*\$?([0-9,]+\.?[0-9]*)',
-                'deductible': r'deductible[:\s]*\$?([0-9,]+\.?[0-9]*)',
-                'coinsurance': r'coinsurance[:\s]*([0-9]+)%?'
-            }
-            
-            for key, pattern in financial_patterns.items():
-                match = re.search(pattern, response_lower)
-                if match:
-                    value = match.group(1).strip()
-                    self.session.data[f'insurance_{key}'] = value
-                    print(f"💰 EXTRACTED {key.upper()}: ${value}")
+            for key, value in _scan_fields(_ELIGIBILITY_FIELDS_RE, response_lower).items():
+                value = value.strip()
+                self.session.data[f'insurance_{key}'] = value
+                logger.debug("Extracted %s: %s", key, value)
     
     async def _end_conversation(self, reason: str):
         """Intelligently end conversation with comprehensive summary"""
@@ -1120,7 +1848,8 @@ class HealthcareVoiceAgent:
         # Generate intelligent confirmation if appropriate
         if self._should_generate_confirmation():
             if not self.session.data.get("confirmation_code"):
-                confirmation = ''.join(random.choices(string.ascii_uppercase + string.digits, k=5))
+                confirmation = ''.join(secrets.choice(CONFIRMATION_CODE_ALPHABET)
+                                       for _ in range(CONFIRMATION_CODE_LENGTH))
                 self.session.data["confirmation_code"] = confirmation
                 
                 patient_name = self.session.data.get('name', 'Patient')
@@ -1141,15 +1870,15 @@ class HealthcareVoiceAgent:
         self.session.add_message("assistant", end_message)
         
         # Save comprehensive session
-        filename = self.session.save()
+        # Disk I/O (incl. fsync) runs off the event loop
+        filename = await asyncio.get_running_loop().run_in_executor(_EXEC, self.session.save)
         
         # Display intelligent summary
         self._display_final_summary(reason, filename)
     
     def _should_generate_confirmation(self) -> bool:
         """Intelligently determine if confirmation should be generated"""
-        required_for_confirmation = ['name', 'preferred_date']
-        return all(self.session.data.get(field) for field in required_for_confirmation)
+        return not (self.session.missing_fields & CONFIRMATION_FIELDS)
     
     def _display_final_summary(self, reason: str, filename: str):
         """Display comprehensive conversation summary"""
@@ -1162,8 +1891,8 @@ class HealthcareVoiceAgent:
         print(f"📋 Session ID: {self.session.session_id}")
         print(f"⏱️  Duration: {duration/60:.2f} minutes ({duration:.1f} seconds)")
         print(f"🎯 Completion: {self.session.get_completion_percentage():.1f}%")
-        print(f"💬 Total turns: {len(self.session.conversation)}")
-        print(f"🔗 API calls: {len(self.session.api_calls)}")
+        print(f"💬 Total turns: {self.session.total_turns}")
+        print(f"🔗 API calls: {self.session.total_api_calls}")
         print(f"🏁 End reason: {reason}")
         print(f"📁 Saved to: {filename}")
         
@@ -1188,6 +1917,10 @@ class HealthcareVoiceAgent:
         try:
             print("🧹 CLEANING UP RESOURCES...")
             self.audio.cleanup()
+            self.mcp_api.close()
+            self.llm.close()
+            self._http.close()
+            self.session.close()
             print("✅ Cleanup completed")
         except Exception as e:
             logger.warning(f"Cleanup issue: {e}")
@@ -1232,6 +1965,16 @@ def load_config():
         print(f"\nPlease set these environment variables and try again.")
         return None
     
+    # Stream LLM replies so speech starts on the first sentence; non-SSE endpoints still
+    # work (the plain JSON body is parsed after the fact). LLM_STREAMING=0 disables.
+    config['llm_streaming'] = os.getenv('LLM_STREAMING', '1').strip().lower() not in ('0', 'false', 'no')
+    # Optional: coalesce concurrent MCP calls into JSON-RPC batches (0 disables)
+    try:
+        config['mcp_batch_window_ms'] = max(0, int(os.getenv('MCP_BATCH_WINDOW_MS', '0')))
+    except ValueError:
+        print("   ⚠️  MCP_BATCH_WINDOW_MS is not an integer, batching disabled")
+        config['mcp_batch_window_ms'] = 0
+    
     print("✅ CONFIGURATION VALIDATED")
     return config
 
@@ -1254,7 +1997,9 @@ async def main():
             project_id=config['project_id'],
             connection_id=config['connection_id'],
             mcp_url=config['mcp_url'],
-            insurance_api_key=config['insurance_api_key']
+            insurance_api_key=config['insurance_api_key'],
+            llm_streaming=config['llm_streaming'],
+            mcp_batch_window_ms=config['mcp_batch_window_ms']
         )
         
         # Start intelligent conversation
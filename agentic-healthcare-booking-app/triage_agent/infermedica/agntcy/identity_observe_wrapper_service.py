@@ -2,19 +2,65 @@
 A2A Medical Triage Service with TBAC and Observe Integration
 """
 
+# gevent must patch sockets before requests/threading are imported
+try:
+    from gevent import monkey  # Optional: cooperative server so triage API calls overlap
+    monkey.patch_all()
+    from gevent.pool import Pool
+    from gevent.pywsgi import WSGIServer
+except ImportError:
+    WSGIServer = None
+else:
+    # The default OTLP exporters use gRPC, whose C-core threads stall under monkey-patching
+    # unless grpcio is switched to gevent-cooperative polling before any channel is created
+    try:
+        from grpc.experimental import gevent as grpc_gevent
+    except ImportError:
+        grpc_gevent = None
+    if grpc_gevent is not None:
+        grpc_gevent.init_gevent()
+
+try:
+    from waitress import serve as waitress_serve  # Optional: threaded production WSGI server
+except ImportError:
+    waitress_serve = None
+
 import json
 import os
 import re
 import base64
-import uuid
+import hmac
+import functools
+import secrets
 import time
 import logging
+import threading
+from collections import OrderedDict, deque
+from itertools import islice
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Tuple
 from enum import Enum
 
+try:
+    import orjson  # Optional: faster JSON encode/decode for responses and request bodies
+except ImportError:
+    orjson = None
+
+try:
+    import httpx  # Optional: HTTP/2 multiplexing when installed with the http2 extra
+except ImportError:
+    httpx = None
+
+try:
+    import redis  # Optional: share completed summaries across worker processes
+except ImportError:
+    redis = None
+
 import requests
-from flask import Flask, request, jsonify
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from flask import Flask, Response, request
 from flask_cors import CORS
 
 # TBAC imports
@@ -32,6 +78,117 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Concurrent requests served when running under gevent
+SERVER_MAX_GREENLETS = 200
+# Worker threads when running under waitress
+SERVER_THREADS = 32
+
+# Tasks kept in memory; idle tasks expire, finished ones sooner
+TASK_STORE_MAX_SIZE = 10000
+TASK_TTL = 3600
+# Messages retained per task; older turns are dropped
+TASK_HISTORY_MAX = 1024
+TERMINAL_TASK_TTL = 600
+
+# Completed survey summaries kept in memory (they do not change once assessed)
+SUMMARY_CACHE_SIZE = 4096
+# Lifetime of summaries shared through Redis when REDIS_URL is set
+SUMMARY_REDIS_TTL = 24 * 3600
+
+# Refresh the cached triage token this many seconds before it expires
+TRIAGE_TOKEN_EXPIRY_MARGIN = 60
+# Lifetime assumed when the token endpoint omits expires_in
+TRIAGE_TOKEN_DEFAULT_TTL = 300
+# Start a background refresh this many seconds before the token expires
+TRIAGE_TOKEN_REFRESH_AHEAD = 2 * TRIAGE_TOKEN_EXPIRY_MARGIN
+# Extra token requests after a 429, and the longest Retry-After honoured for each
+TRIAGE_TOKEN_RATE_LIMIT_RETRIES = 2
+TRIAGE_TOKEN_MAX_RETRY_AFTER = 10
+# How long a bidirectional TBAC authorization is trusted before re-checking
+TBAC_AUTH_TTL = 300
+# Back-off before retrying a failed TBAC authorization
+TBAC_RETRY_INTERVAL = 30
+
+_AGE_RE = re.compile(
+    r'\b(?:(\d{1,2})\s*(?:years?\s*old|yo)|age\s*(?:is\s*)?(\d{1,2})|i\s*am\s*(\d{1,2}))\b'
+)
+_SEX_RE = re.compile(r'\b(male|man|boy|he|his|him|female|woman|girl|she|her)\b')
+_SEX_MAP = {
+    'male': 'male', 'man': 'male', 'boy': 'male', 'he': 'male', 'his': 'male', 'him': 'male',
+    'female': 'female', 'woman': 'female', 'girl': 'female', 'she': 'female', 'her': 'female'
+}
+
+@functools.lru_cache(maxsize=2048)
+def _extract_demographics_cached(text: str) -> Tuple[Optional[int], Optional[str]]:
+    """Return (age, sex) found in text; memoized since clients often resend the same opening"""
+    text_lower = text.lower()
+    age = sex = None
+    
+    # Age extraction: one scan over all phrasings
+    for match in _AGE_RE.finditer(text_lower):
+        value = int(match.group(1) or match.group(2) or match.group(3))
+        if 1 <= value <= 120:
+            age = value
+            break
+    
+    # Sex extraction: first whole-word match wins
+    match = _SEX_RE.search(text_lower)
+    if match:
+        sex = _SEX_MAP[match.group(1)]
+    
+    return age, sex
+
+def _new_id():
+    """Random 128-bit identifier for tasks, contexts, messages and artifacts"""
+    return secrets.token_hex(16)
+
+@functools.lru_cache(maxsize=2)
+def _iso_for_second(second: int) -> str:
+    return datetime.fromtimestamp(second).isoformat()
+
+def _now_iso():
+    """Second-resolution ISO timestamp, formatted at most once per second"""
+    return _iso_for_second(int(time.time()))
+
+def _dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, separators=(',', ':')).encode()
+
+def _loads(body):
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+def _build_http_session():
+    """Create a pooled HTTP session for the external triage API.
+
+    Uses an HTTP/2 httpx client when httpx[http2] is installed, otherwise requests.
+    Both expose the request()/status_code/json()/text calls used by the service.
+    """
+    if httpx is not None:
+        try:
+            transport = httpx.HTTPTransport(
+                http2=True,
+                retries=2,  # Connection failures only
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+            )
+            return httpx.Client(transport=transport, timeout=30.0,
+                                headers={"User-Agent": "a2a-triage-service/1.0.0"})
+        except ImportError:
+            pass  # h2 missing: fall back to HTTP/1.1 keep-alive
+    
+    session = requests.Session()
+    # Status retries apply to idempotent methods only (the summary GET); survey and message
+    # POSTs are never replayed, and the token POST handles 429 itself in _fetch_triage_token
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=32,
+        max_retries=Retry(total=2, backoff_factor=0.1, status_forcelist=(429, 502, 503, 504))
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = "a2a-triage-service/1.0.0"
+    return session
+
 class TaskState(str, Enum):
     """A2A Task States as defined in the Agent-to-Agent protocol"""
     SUBMITTED = "submitted"
@@ -44,6 +201,105 @@ class TaskState(str, Enum):
     AUTH_REQUIRED = "auth-required"
     UNKNOWN = "unknown"
 
+@dataclass(slots=True)
+class Task:
+    """In-memory A2A task; expanded to the protocol shape only when serialized"""
+    id: str
+    context_id: str
+    state: TaskState
+    timestamp: str
+    history: deque = field(default_factory=lambda: deque(maxlen=TASK_HISTORY_MAX))
+    artifacts: list = field(default_factory=list)
+    survey_id: Optional[str] = None
+    triage_state: str = "starting"
+    message: Optional[dict] = None
+    last_message_id: Optional[str] = None
+    
+    def to_dict(self, history_length=None, include_history=True):
+        """Return the A2A protocol representation of the task"""
+        status = {"state": self.state, "timestamp": self.timestamp}
+        if self.message is not None:
+            status["message"] = self.message
+        task_dict = {
+            "id": self.id,
+            "contextId": self.context_id,
+            "status": status,
+            "artifacts": self.artifacts,
+            "metadata": {
+                "survey_id": self.survey_id,
+                "triage_state": self.triage_state
+            },
+            "kind": "task"
+        }
+        # Turn responses carry only the latest message in status; full history is served by tasks/get
+        if include_history:
+            skip = max(0, len(self.history) - history_length) if history_length else 0
+            task_dict["history"] = list(islice(self.history, skip, None))
+        return task_dict
+
+_TERMINAL_STATES = frozenset((TaskState.COMPLETED, TaskState.FAILED, TaskState.CANCELED))
+
+# Routing fields added to message/send responses by resulting task state
+_STATE_ROUTING = {
+    TaskState.COMPLETED: {"goto": "healthcare_voice_agent", "success": True, "action": "triage_completed"},
+    TaskState.INPUT_REQUIRED: {"goto": "healthcare_voice_agent", "success": True, "action": "triage_continuing"},
+    TaskState.FAILED: {"goto": "Healthcare_voice_agent", "success": False, "error": True, "action": "triage_failed"}
+}
+
+class TaskStore:
+    """Bounded task map with LRU eviction and idle expiry, shorter for finished tasks"""
+    
+    def __init__(self, max_size=TASK_STORE_MAX_SIZE, ttl=TASK_TTL, terminal_ttl=TERMINAL_TASK_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.terminal_ttl = terminal_ttl
+        self._items = OrderedDict()  # task_id -> (task, last_access)
+        self._lock = threading.RLock()
+    
+    def _expired(self, task, last_access, now):
+        ttl = self.terminal_ttl if task.state in _TERMINAL_STATES else self.ttl
+        return now - last_access > ttl
+    
+    def _lookup(self, task_id):
+        """Return a live task and refresh its position, dropping it if expired"""
+        entry = self._items.get(task_id)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if self._expired(entry[0], entry[1], now):
+            del self._items[task_id]
+            return None
+        self._items[task_id] = (entry[0], now)
+        self._items.move_to_end(task_id)
+        return entry[0]
+    
+    def __contains__(self, task_id):
+        with self._lock:
+            return self._lookup(task_id) is not None
+    
+    def __getitem__(self, task_id):
+        with self._lock:
+            task = self._lookup(task_id)
+            if task is None:
+                raise KeyError(task_id)
+            return task
+    
+    def __setitem__(self, task_id, task):
+        with self._lock:
+            now = time.monotonic()
+            self._items[task_id] = (task, now)
+            self._items.move_to_end(task_id)
+            
+            # Oldest entries sit at the front; evict until one is still live and within bounds
+            while self._items:
+                oldest_id, (oldest, last_access) = next(iter(self._items.items()))
+                if len(self._items) <= self.max_size and not self._expired(oldest, last_access, now):
+                    break
+                del self._items[oldest_id]
+    
+    def __len__(self):
+        return len(self._items)
+
 class TBACConfig:
     """TBAC configuration and authorization handler"""
     
@@ -63,11 +319,18 @@ class TBACConfig:
         self.client_token = None
         self.a2a_token = None
         
+        # Cached once; without the full credential set TBAC is disabled and checks always pass
+        self._credentials_complete = bool(
+            self.client_api_key and self.client_id and self.a2a_api_key and self.a2a_id
+        )
+        self._refresh_after = 0.0
+        self._lock = threading.Lock()
+        
         self._setup()
     
     def _setup(self):
         """Initialize TBAC SDKs"""
-        if not all([self.client_api_key, self.client_id, self.a2a_api_key, self.a2a_id]):
+        if not self._credentials_complete:
             logger.warning("TBAC Disabled: Missing credentials")
             return
         
@@ -87,6 +350,7 @@ class TBACConfig:
             
             if not self.client_token:
                 logger.error("TBAC FAILED: Could not get client agent token")
+                self.client_authorized = False
                 return False
             
             
@@ -100,6 +364,7 @@ class TBACConfig:
                 
         except Exception as e:
             logger.error(f"TBAC client-to-a2a authorization failed: {e}")
+            self.client_authorized = False
             return False
     
     def authorize_a2a_to_client(self):
@@ -112,6 +377,7 @@ class TBACConfig:
             
             if not self.a2a_token:
                 logger.error("TBAC FAILED: Could not get A2A service token")
+                self.a2a_authorized = False
                 return False
             
             
@@ -125,21 +391,40 @@ class TBACConfig:
                 
         except Exception as e:
             logger.error(f"TBAC A2A-to-client authorization failed: {e}")
+            self.a2a_authorized = False
             return False
     
     def authorize_bidirectional(self):
         """Perform bidirectional authorization"""
         client_to_a2a = self.authorize_client_to_a2a()
         a2a_to_client = self.authorize_a2a_to_client()
-        return client_to_a2a and a2a_to_client
+        authorized = client_to_a2a and a2a_to_client
+        self._refresh_after = time.monotonic() + (TBAC_AUTH_TTL if authorized else TBAC_RETRY_INTERVAL)
+        return authorized
+    
+    def _ensure_fresh(self):
+        """Re-authorize only once the cached decision has gone stale"""
+        if time.monotonic() < self._refresh_after:
+            return
+        
+        with self._lock:
+            if time.monotonic() < self._refresh_after:
+                return
+            self.authorize_bidirectional()
     
     def is_client_authorized(self):
         """Check if client agent is authorized to communicate with A2A service"""
-        return self.client_authorized or not all([self.client_api_key, self.a2a_api_key])
+        if not self._credentials_complete:
+            return True
+        self._ensure_fresh()
+        return self.client_authorized
     
     def is_a2a_authorized(self):
         """Check if A2A service is authorized to communicate with client agent"""
-        return self.a2a_authorized or not all([self.client_api_key, self.a2a_api_key])
+        if not self._credentials_complete:
+            return True
+        self._ensure_fresh()
+        return self.a2a_authorized
     
     def is_fully_authorized(self):
         """Check if both directions are authorized"""
@@ -159,6 +444,9 @@ class A2ATriageService:
         self.port = port
         self.debug = debug
         
+        # Pooled keep-alive connections to the external triage API
+        self._http = _build_http_session()
+        
         # Initialize TBAC
         self.tbac = TBACConfig() if enable_tbac else None
         self.enable_tbac = enable_tbac
@@ -167,14 +455,50 @@ class A2ATriageService:
         self.shared_key = os.getenv("SHARED_KEY")
         if not self.shared_key:
             logger.warning("SHARED_KEY not found in environment variables")
+        self._shared_key_bytes = self.shared_key.encode() if self.shared_key else None
+        self._auth_disabled = self._shared_key_bytes is None
         
         # In-memory storage for tasks and contexts
-        self.tasks = {}
+        self.tasks = TaskStore()
         self.contexts = {}
         
         # Load triage API configuration
         self._load_triage_config()
         
+        # Token request headers and body never change for the life of the process
+        creds = base64.b64encode(f"{self.triage_app_id}:{self.triage_app_key}".encode()).decode()
+        self._token_auth_headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Basic {creds}",
+            "instance-id": self.triage_instance_id
+        }
+        self._token_payload = {"grant_type": "client_credentials"}
+        
+        # Triage OAuth token shared across sessions until it nears expiry
+        self._triage_token_cache = {'token': None, 'exp': 0.0}
+        self._triage_token_refreshing = False
+        self._triage_token_lock = threading.Lock()
+        
+        # survey_id -> summary for completed assessments
+        self._summary_cache = OrderedDict()
+        self._summary_cache_lock = threading.Lock()
+        redis_url = os.getenv("REDIS_URL")
+        self._redis = redis.Redis.from_url(redis_url) if redis is not None and redis_url else None
+        
+        # Fetch the first token and open the API connection off the request path,
+        # so the first session pays neither the token round trip nor the TLS handshake
+        threading.Thread(target=self._warm_triage_token, name="triage-warmup", daemon=True).start()
+        
+        # JSON-RPC method dispatch table
+        self._rpc_methods = {
+            'message/send': self._handle_message_send,
+            'tasks/get': self._handle_tasks_get,
+            'tasks/cancel': self._handle_tasks_cancel
+        }
+        
+        # Static agent card body, serialized once
+        self._card_template = self._build_agent_card_template()
+        
         # Setup Flask routes
         self._setup_routes()
         
@@ -213,16 +537,18 @@ class A2ATriageService:
     def _timed_external_request(self, method, url, description, **kwargs):
         """Make a timed request to external API"""
         try:
-            if method == 'GET':
-                response = requests.get(url, **kwargs)
-            elif method == 'POST':
-                response = requests.post(url, **kwargs)
-            else:
+            if method not in ('GET', 'POST'):
                 raise ValueError(f"Unsupported method: {method}")
             
+            response = self._http.request(method, url, timeout=kwargs.pop('timeout', 10), **kwargs)
+            
             if response.status_code != 200:
                 logger.error(f"External API error: {response.status_code} - {response.text[:300]}")
             
+            # A rejected bearer token is dropped so the next call fetches a fresh one
+            if response.status_code == 401 and kwargs.get('headers', {}).get('Authorization', '').startswith('Bearer '):
+                self._triage_token_cache['exp'] = 0.0
+            
             return response, 0
             
         except Exception as e:
@@ -253,93 +579,101 @@ class A2ATriageService:
 
     def require_auth(self, f):
         """Decorator to require X-Shared-Key authentication"""
+        @functools.wraps(f)
         def decorated_function(*args, **kwargs):
-            auth_header = request.headers.get("X-Shared-Key")
-            if not self.shared_key:
-                logger.warning("SHARED_KEY not configured - authentication disabled")
+            # SHARED_KEY absence is already logged once at startup
+            if self._auth_disabled:
                 return f(*args, **kwargs)
             
+            auth_header = request.headers.get("X-Shared-Key")
             if not auth_header:
                 logger.warning("Missing X-Shared-Key header")
-                return jsonify(self._create_error_response(
+                return self._json(self._create_error_response(
                     None, 401, "Authorization required"
-                )), 401
+                ), 401)
             
-            if auth_header != self.shared_key:
+            if not hmac.compare_digest(auth_header.encode(), self._shared_key_bytes):
                 logger.warning(f"Invalid X-Shared-Key: {auth_header[:10]}...")
-                return jsonify(self._create_error_response(
+                return self._json(self._create_error_response(
                     None, 401, "Invalid authorization key"
-                )), 401
+                ), 401)
             
             return f(*args, **kwargs)
         
-        decorated_function.__name__ = f.__name__
         return decorated_function
 
+    def _build_agent_card_template(self):
+        """Serialize the static agent card once, with a __HOST__ placeholder for the request host"""
+        card_data = {
+            "name": "Medical Triage Agent A2A service",
+            "description": "A2A service for an AI agent that performs medical symptom triage and assessment using professional medical protocols",
+            "url": "http://__HOST__",
+            "provider": {
+                "organization": "Outshift",
+                "url": "http://__HOST__"
+            },
+            "iconUrl": "http://__HOST__/icon.png",
+            "version": "1.0.0",
+            "documentationUrl": "http://__HOST__/docs",
+            "capabilities": {
+                "streaming": False,
+                "pushNotifications": False,
+                "stateTransitionHistory": False,
+                "extensions": []
+            },
+            "securitySchemes": {
+                "tbac": {
+                    "type": "http",
+                    "scheme": "bearer",
+                    "description": "Task-Based Access Control (TBAC)"
+                } if self.enable_tbac else {
+                    "type": "http",
+                    "scheme": "none"
+                }
+            },
+            "security": ["tbac"] if self.enable_tbac else [],
+            "defaultInputModes": ["text/plain", "application/json"],
+            "defaultOutputModes": ["text/plain", "application/json"],
+            "skills": [
+                {
+                    "id": "medical-triage",
+                    "name": "Medical Symptom Triage A2A Service",
+                    "description": "Performs comprehensive medical symptom assessment and triage using AI-powered clinical protocols",
+                    "tags": ["healthcare", "triage", "medical", "symptoms", "diagnosis"],
+                    "examples": [
+                        "I have chest pain and shortness of breath",
+                        "My child has a fever and headache",
+                        "I'm experiencing severe abdominal pain"
+                    ],
+                    "inputModes": ["text/plain", "application/json"],
+                    "outputModes": ["text/plain", "application/json"]
+                }
+            ],
+            "supportsAuthenticatedExtendedCard": False
+        }
+        return _dumps(card_data)
+    
     def _setup_routes(self):
         """Setup Flask routes for A2A protocol endpoints"""
         
         @self.app.route('/.well-known/agent-card.json', methods=['GET'])
         def agent_card():
             """A2A Agent Discovery Card"""
-            card_data = {
-                "name": "Medical Triage Agent A2A service",
-                "description": "A2A service for an AI agent that performs medical symptom triage and assessment using professional medical protocols",
-                "url": f"http://{request.host}",
-                "provider": {
-                    "organization": "Outshift",
-                    "url": f"http://{request.host}"
-                },
-                "iconUrl": f"http://{request.host}/icon.png",
-                "version": "1.0.0",
-                "documentationUrl": f"http://{request.host}/docs",
-                "capabilities": {
-                    "streaming": False,
-                    "pushNotifications": False,
-                    "stateTransitionHistory": False,
-                    "extensions": []
-                },
-                "securitySchemes": {
-                    "tbac": {
-                        "type": "http",
-                        "scheme": "bearer",
-                        "description": "Task-Based Access Control (TBAC)"
-                    } if self.enable_tbac else {
-                        "type": "http",
-                        "scheme": "none"
-                    }
-                },
-                "security": ["tbac"] if self.enable_tbac else [],
-                "defaultInputModes": ["text/plain", "application/json"],
-                "defaultOutputModes": ["text/plain", "application/json"],
-                "skills": [
-                    {
-                        "id": "medical-triage",
-                        "name": "Medical Symptom Triage A2A Service",
-                        "description": "Performs comprehensive medical symptom assessment and triage using AI-powered clinical protocols",
-                        "tags": ["healthcare", "triage", "medical", "symptoms", "diagnosis"],
-                        "examples": [
-                            "I have chest pain and shortness of breath",
-                            "My child has a fever and headache",
-                            "I'm experiencing severe abdominal pain"
-                        ],
-                        "inputModes": ["text/plain", "application/json"],
-                        "outputModes": ["text/plain", "application/json"]
-                    }
-                ],
-                "supportsAuthenticatedExtendedCard": False
-            }
+            # Escape the host the same way the encoder would before splicing it in
+            host = _dumps(request.host)[1:-1]
+            body = self._card_template.replace(b'__HOST__', host)
             
             # Add TBAC status to card if enabled
             if self.enable_tbac and self.tbac:
-                card_data["tbac_status"] = {
+                tbac_status = {
                     "enabled": True,
                     "client_authorized": self.tbac.is_client_authorized(),
                     "a2a_authorized": self.tbac.is_a2a_authorized(),
                     "fully_authorized": self.tbac.is_fully_authorized()
                 }
+                body = body[:-1] + b',"tbac_status":' + _dumps(tbac_status) + b'}'
             
-            return jsonify(card_data)
+            return Response(body, mimetype='application/json')
         
         @self.app.route('/health', methods=['GET'])
         @self.require_auth
@@ -347,7 +681,7 @@ class A2ATriageService:
             """Health check endpoint with TBAC status"""
             health_data = {
                 "status": "healthy",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": _now_iso(),
                 "version": "1.0.0",
                 "active_tasks": len(self.tasks)
             }
@@ -360,12 +694,12 @@ class A2ATriageService:
                     "fully_authorized": self.tbac.is_fully_authorized()
                 }
             
-            return jsonify(health_data)
+            return self._json(health_data)
         
         @self.app.route('/docs', methods=['GET'])
         def documentation():
             """Basic documentation endpoint"""
-            return jsonify({
+            return self._json({
                 "title": "Medical Triage A2A Service",
                 "description": "Agent-to-Agent protocol service for medical symptom triage",
                 "tbac_enabled": self.enable_tbac,
@@ -387,11 +721,11 @@ class A2ATriageService:
         def handle_jsonrpc():
             """Main JSON-RPC 2.0 endpoint for A2A protocol with TBAC"""
             try:
-                data = request.get_json()
+                data = _loads(request.get_data(cache=False))
                 
                 if not self._validate_jsonrpc_request(data):
                     logger.warning(f"Invalid JSON-RPC request: {data}")
-                    return jsonify(self._create_error_response(
+                    return self._json(self._create_error_response(
                         data.get('id'), -32600, "Invalid Request"
                     ))
                 
@@ -402,34 +736,35 @@ class A2ATriageService:
                 
                 # TBAC authorization check for incoming requests
                 if not self._check_authorization("receive_message"):
-                    return jsonify(self._create_tbac_error_response(request_id, "receive_message"))
+                    return self._json(self._create_tbac_error_response(request_id, "receive_message"))
                 
-                if method == 'message/send':
-                    return jsonify(self._handle_message_send(params, request_id))
-                elif method == 'tasks/get':
-                    return jsonify(self._handle_tasks_get(params, request_id))
-                elif method == 'tasks/cancel':
-                    return jsonify(self._handle_tasks_cancel(params, request_id))
-                else:
+                handler = self._rpc_methods.get(method)
+                if handler is None:
                     logger.warning(f"Unknown method: {method}")
-                    return jsonify(self._create_error_response(
+                    return self._json(self._create_error_response(
                         request_id, -32601, "Method not found"
                     ))
+                
+                return self._json(handler(params, request_id))
                     
             except Exception as e:
                 logger.error(f"Error handling JSON-RPC request: {e}", exc_info=True)
-                return jsonify(self._create_error_response(
+                return self._json(self._create_error_response(
                     None, -32603, "Internal error"
                 ))
         @self.app.errorhandler(404)
         def not_found(error):
-            return jsonify({"error": "Not found"}), 404
+            return self._json({"error": "Not found"}, 404)
 
         @self.app.errorhandler(500)
         def internal_error(error):
             logger.error(f"Internal server error: {error}")
-            return jsonify({"error": "Internal server error"}), 500
+            return self._json({"error": "Internal server error"}, 500)
 
+    def _json(self, payload, status=200):
+        """Build a JSON response, using orjson when available"""
+        return Response(_dumps(payload), status=status, mimetype='application/json')
+    
     def _validate_jsonrpc_request(self, data):
         """Validate JSON-RPC 2.0 request format"""
         if not isinstance(data, dict):
@@ -470,91 +805,58 @@ class A2ATriageService:
             if not message:
                 return self._create_error_response(request_id, -32602, "Invalid params: missing message")
             
-            parts = message.get('parts', [])
+            parts = message.get('parts') or ()
             task_id = message.get('taskId')
             context_id = message.get('contextId')
-            message_id = message.get('messageId', str(uuid.uuid4()))
             
-            user_text = ""
-            for part in parts:
-                if part.get('kind') == 'text':
-                    user_text = part.get('text', '')
-                    break
+            user_text = next((part.get('text', '') for part in parts if part.get('kind') == 'text'), "")
             
             if task_id and task_id in self.tasks:
                 result= self._continue_existing_task(task_id, user_text, request_id, message)
             else:
                 result= self._create_new_task(user_text, context_id, request_id, message)
             
-            if 'result' in result:
-                task_result=result['result']
-                task_state=task_result.get('status',{}).get('state')
-                if task_state == TaskState.COMPLETED:
-                    return{
-                        **result,
-                        "goto":"healthcare_voice_agent",
-                        "success":True,
-                        "action":"triage_completed"
-                    }
-                elif task_state == TaskState.INPUT_REQUIRED:
-                    return{
-                        **result,
-                        "goto":"healthcare_voice_agent",
-                        "success":True,
-                        "action":"triage_continuing"
-                    }
-                elif task_state == TaskState.FAILED:
-                    return{
-                        **result,
-                        "goto":"Healthcare_voice_agent",
-                        "success":False,
-                        "error":True,
-                        "action":"triage_failed"
-                    }
+            # Replayed replies keep their own marker instead of the state routing
+            if 'result' in result and result.get('action') != "triage_replayed":
+                task_state = result['result'].get('status', {}).get('state')
+                routing = _STATE_ROUTING.get(task_state)
+                if routing:
+                    result.update(routing)
             return result
         except Exception as e:
-            print(f"A2A-SERVICE: Error in message/send: {e}")
+            logger.error("A2A-SERVICE: Error in message/send: %s", e, exc_info=True)
             error_response= self._create_error_response(request_id, -32603, "Internal error")
-            return{
-                **error_response,
-                "goto":"healthcare_voice_agent",
-                "success":False,
-                "error":True,
-                "error_message":str(e)
-            }
+            error_response.update(
+                goto="healthcare_voice_agent",
+                success=False,
+                error=True,
+                error_message=str(e)
+            )
+            return error_response
     
     @workflow(name="medical_triage_workflow", description="complete medical triage workflow", version=1)
     def _create_new_task(self, user_text, context_id, request_id, original_message):
-        task_id = str(uuid.uuid4())
+        task_id = _new_id()
         if not context_id:
-            context_id = str(uuid.uuid4())
+            context_id = _new_id()
         
-        print(f"A2A-SERVICE: Creating new task {task_id}")
+        logger.debug("A2A-SERVICE: Creating new task %s", task_id)
         
-        task = {
-            "id": task_id,
-            "contextId": context_id,
-            "status": {
-                "state": TaskState.SUBMITTED,
-                "timestamp": datetime.now().isoformat()
-            },
-            "history": [original_message],
-            "artifacts": [],
-            "metadata": {
-                "triage_token": None,
-                "survey_id": None,
-                "triage_state": "starting"
-            },
-            "kind": "task"
-        }
+        task = Task(
+            id=task_id,
+            context_id=context_id,
+            state=TaskState.SUBMITTED,
+            timestamp=_now_iso(),
+            history=deque((original_message,), maxlen=TASK_HISTORY_MAX)
+        )
         
         demographics = self._extract_demographics(user_text)
         age = demographics.get('age', 30)
         sex = demographics.get('sex', 'male')
         
-        print(f"A2A-SERVICE: Starting triage with age={age}, sex={sex}")
+        logger.debug("A2A-SERVICE: Starting triage with age=%s, sex=%s", age, sex)
         
-        logger.error(f"DEBUG: user_text='{user_text}', demographics={demographics}, age={age}, sex={sex}")
+        logger.debug("user_text=%r demographics=%r age=%s sex=%s", user_text, demographics, age, sex)
         
         if not age or not sex:
             logger.error(f"Missing required demographics: age={age}, sex={sex}")
@@ -566,62 +868,75 @@ class A2ATriageService:
         result = self._start_triage_session(age, sex, user_text, task)
         
         if result['success']:
-            task['metadata'].update(result['metadata'])
-            task['status']['state'] = TaskState.INPUT_REQUIRED
+            task.survey_id = result['metadata']['survey_id']
+            task.state = TaskState.INPUT_REQUIRED
             
             agent_message = {
                 "role": "agent",
                 "parts": [{"kind": "text", "text": result['response']}],
-                "messageId": str(uuid.uuid4()),
+                "messageId": _new_id(),
                 "taskId": task_id,
                 "contextId": context_id,
                 "kind": "message"
             }
-            task['history'].append(agent_message)
-            task['status']['message'] = agent_message
-            task['metadata']['triage_state'] = 'in_progress'
+            task.history.append(agent_message)
+            task.message = agent_message
+            task.triage_state = 'in_progress'
             
-            print(f"A2A-SERVICE: Triage started successfully for task {task_id}")
+            logger.debug("A2A-SERVICE: Triage started successfully for task %s", task_id)
             self.tasks[task_id] = task
-            success_response= self._create_success_response(request_id, task)
-            return {
-                **success_response,
-                "goto":"healthcare_voice_agent",
-                "success":True,
-                "action":"triage_started",
-                "task_id":task_id
-            }
+            success_response= self._create_success_response(request_id, task.to_dict(include_history=False))
+            success_response.update(
+                goto="healthcare_voice_agent",
+                success=True,
+                action="triage_started",
+                task_id=task_id
+            )
+            return success_response
         else:
-            task['status']['state'] = TaskState.FAILED
-            print(f"A2A-SERVICE: Triage start failed for task {task_id}")
+            task.state = TaskState.FAILED
+            logger.warning("A2A-SERVICE: Triage start failed for task %s", task_id)
             self.tasks[task_id] = task
-            error_response= self._create_success_response(request_id, task)
-            return {
-                **error_response,
-                "goto":"healthcare_voice_agent",
-                "success":False,
-                "error":True,
-                "action":"triage_failed"
-            }
+            error_response= self._create_success_response(request_id, task.to_dict(include_history=False))
+            error_response.update(
+                goto="healthcare_voice_agent",
+                success=False,
+                error=True,
+                action="triage_failed"
+            )
+            return error_response
     
     
     def _continue_existing_task(self, task_id, user_text, request_id, message):
         task = self.tasks[task_id]
         
-        print(f"A2A-SERVICE: Continuing task {task_id}, current state: {task['status']['state']}")
+        logger.debug("A2A-SERVICE: Continuing task %s, current state: %s", task_id, task.state)
         
-        if task['status']['state'] in [TaskState.COMPLETED, TaskState.FAILED, TaskState.CANCELED]:
-            print(f"A2A-SERVICE: Task {task_id} already in terminal state")
+        # A retried message that was already answered is replayed from the task rather than
+        # re-posted, which would feed the same answer into the survey twice
+        message_id = message.get('messageId')
+        if message_id and message_id == task.last_message_id:
+            logger.debug("A2A-SERVICE: Replaying reply to message %s for task %s", message_id, task_id)
+            success_response = self._create_success_response(request_id, task.to_dict(include_history=False))
+            success_response.update(
+                goto="healthcare_voice_agent",
+                success=True,
+                action="triage_replayed"
+            )
+            return success_response
+        
+        if task.state in _TERMINAL_STATES:
+            logger.debug("A2A-SERVICE: Task %s already in terminal state", task_id)
             error_response= self._create_error_response(request_id, -32002, "Task cannot be continued")
-            return{
-                **error_response,
-                "goto":"healthcare_voice_agent",
-                "success":False,
-                "error":True,
-                "action":"task_terminal_state"
-            }
+            error_response.update(
+                goto="healthcare_voice_agent",
+                success=False,
+                error=True,
+                action="task_terminal_state"
+            )
+            return error_response
         
-        task['history'].append(message)
+        task.history.append(message)
         
         result = self._send_triage_message(task, user_text)
         
@@ -629,35 +944,38 @@ class A2ATriageService:
             agent_message = {
                 "role": "agent",
                 "parts": [{"kind": "text", "text": result['response']}],
-                "messageId": str(uuid.uuid4()),
+                "messageId": _new_id(),
                 "taskId": task_id,
-                "contextId": task['contextId'],
+                "contextId": task.context_id,
                 "kind": "message"
             }
-            task['history'].append(agent_message)
-            task['status']['message'] = agent_message
+            task.history.append(agent_message)
+            task.message = agent_message
+            task.last_message_id = message_id
             
             
             external_state = result.get('state', 'in_progress')
-            task['metadata']['triage_state'] = external_state
+            task.triage_state = external_state
             
-            print(f"A2A-SERVICE: External triage state: {external_state}")
+            logger.debug("A2A-SERVICE: External triage state: %s", external_state)
             
            
             if external_state == 'present_result':
-                print("A2A-SERVICE: Triage completed - changing to COMPLETED state")
-                task['status']['state'] = TaskState.COMPLETED
-              
+                logger.debug("A2A-SERVICE: Triage completed - changing to COMPLETED state")
+                task.state = TaskState.COMPLETED
+                
+                # The summary only exists once the message reply reports present_result, so the two
+                # calls cannot overlap; concurrency across patients comes from the server in run()
                 summary_result = self._get_triage_summary(task)
                 artifact_data = {
                     "urgency_level": summary_result.get('urgency_level', 'standard'),
                     "doctor_type": summary_result.get('doctor_type', 'general practitioner'),
                     "notes": summary_result.get('notes', 'Triage assessment completed'),
-                    "completed_at": datetime.now().isoformat()
+                    "completed_at": _now_iso()
                 }
                 
                 artifact = {
-                    "artifactId": str(uuid.uuid4()),
+                    "artifactId": _new_id(),
                     "name": "Medical Triage Assessment",
                     "description": "Results from medical triage evaluation",
                     "parts": [
@@ -667,88 +985,70 @@ class A2ATriageService:
                         }
                     ]
                 }
-                task['artifacts'] = [artifact]
-                print(f"A2A-SERVICE: Task {task_id} COMPLETED with results")
-                success_response = self._create_success_response(request_id,task)
-                return{
-                    **success_response,
-                    "goto":"healthcare_voice_agent",
-                    "success":True,
-                    "action":"triage_completed",
-                    "urgency_level":artifact_data["urgency_level"],
-                    "doctor_type":artifact_data["doctor_type"]
-                }
+                task.artifacts = [artifact]
+                logger.debug("A2A-SERVICE: Task %s COMPLETED with results", task_id)
+                success_response = self._create_success_response(request_id, task.to_dict(include_history=False))
+                success_response.update(
+                    goto="healthcare_voice_agent",
+                    success=True,
+                    action="triage_completed",
+                    urgency_level=artifact_data["urgency_level"],
+                    doctor_type=artifact_data["doctor_type"]
+                )
+                return success_response
                 
             elif external_state == 'in_progress':
-                task['status']['state'] = TaskState.INPUT_REQUIRED
-                print(f"A2A-SERVICE: Task {task_id} waiting for more input")
-                success_response = self._create_success_response(request_id,task)
-                return{
-                    **success_response,
-                    "goto":"healthcare_voice_agent",
-                    "success":True,
-                    "action":"triage_continuing"
-                }
+                task.state = TaskState.INPUT_REQUIRED
+                logger.debug("A2A-SERVICE: Task %s waiting for more input", task_id)
+                success_response = self._create_success_response(request_id, task.to_dict(include_history=False))
+                success_response.update(
+                    goto="healthcare_voice_agent",
+                    success=True,
+                    action="triage_continuing"
+                )
+                return success_response
                 
             elif external_state == 'post_result':
-                print("A2A-SERVICE: WARNING - received post_result, task should already be completed")
-                task['status']['state'] = TaskState.COMPLETED
-                success_response = self._create_success_response(request_id,task)
-                return{
-                    **success_response,
-                    "goto":"healthcare_voice_agent",
-                    "success":True,
-                    "action":"triage_post_result"
-                }
+                logger.warning("A2A-SERVICE: received post_result, task should already be completed")
+                task.state = TaskState.COMPLETED
+                success_response = self._create_success_response(request_id, task.to_dict(include_history=False))
+                success_response.update(
+                    goto="healthcare_voice_agent",
+                    success=True,
+                    action="triage_post_result"
+                )
+                return success_response
                 
             else:
-                task['status']['state'] = TaskState.INPUT_REQUIRED
-                success_response = self._create_success_response(request_id,task)
-                return{
-                    **success_response,
-                    "goto":"healthcare_voice_agent",
-                    "success":True,
-                    "action":"triage_default_continue"
-                }
+                task.state = TaskState.INPUT_REQUIRED
+                success_response = self._create_success_response(request_id, task.to_dict(include_history=False))
+                success_response.update(
+                    goto="healthcare_voice_agent",
+                    success=True,
+                    action="triage_default_continue"
+                )
+                return success_response
                 
         else:
-            task['status']['state'] = TaskState.FAILED
-            success_response = self._create_success_response(request_id,task)
-            return{
-                    **success_response,
-                    "goto":"healthcare_voice_agent",
-                    "success":False,
-                    "error":True,
-                    "action":"triage_message_failed"
-                }
+            task.state = TaskState.FAILED
+            success_response = self._create_success_response(request_id, task.to_dict(include_history=False))
+            success_response.update(
+                goto="healthcare_voice_agent",
+                success=False,
+                error=True,
+                action="triage_message_failed"
+            )
+            return success_response
     
     @tool(name="extract_demographics")
     def _extract_demographics(self, text):
         """Extract age and sex from user input text"""
+        age, sex = _extract_demographics_cached(text)
         demographics = {}
-        
-        # Age extraction patterns
-        age_patterns = [
-            r'\b(\d{1,2})\s*(?:years?\s*old|yo)\b',
-            r'\bage\s*(?:is\s*)?(\d{1,2})\b',
-            r'\bi\s*am\s*(\d{1,2})\b'
-        ]
-        
-        for pattern in age_patterns:
-            match = re.search(pattern, text.lower())
-            if match:
-                age = int(match.group(1))
-                if 1 <= age <= 120:
-                    demographics['age'] = age
-                    break
-        
-        # Sex extraction
-        text_lower = text.lower()
-        if any(word in text_lower for word in ['male', 'man', 'boy', 'he', 'his', 'him']):
-            demographics['sex'] = 'male'
-        elif any(word in text_lower for word in ['female', 'woman', 'girl', 'she', 'her']):
-            demographics['sex'] = 'female'
-        
+        if age is not None:
+            demographics['age'] = age
+        if sex is not None:
+            demographics['sex'] = sex
         return demographics
     
     @workflow(name="start_triage_session", description="start a new triage session with external API", version=1)
@@ -764,7 +1064,6 @@ class A2ATriageService:
                 'success': True,
                 'response': initial_response.get('response', 'Medical triage session started. Please describe your symptoms.'),
                 'metadata': {
-                    'triage_token': token,
                     'survey_id': survey_id
                 }
             }
@@ -776,8 +1075,8 @@ class A2ATriageService:
     def _send_triage_message(self, task, message):
         """Send message to external triage API"""
         try:
-            token = task['metadata']['triage_token']
-            survey_id = task['metadata']['survey_id']
+            token = self._get_triage_token()
+            survey_id = task.survey_id
             
             result = self._send_triage_api_message(token, survey_id, message)
             return result
@@ -787,9 +1086,19 @@ class A2ATriageService:
     
     def _get_triage_summary(self, task):
         """Get triage summary from external API with timing"""
+        survey_id = task.survey_id
+        with self._summary_cache_lock:
+            cached = self._summary_cache.get(survey_id)
+        if cached is not None:
+            return cached
+        
+        shared = self._get_shared_summary(survey_id)
+        if shared is not None:
+            self._cache_summary(survey_id, shared, share=False)
+            return shared
+        
         try:
-            token = task['metadata']['triage_token']
-            survey_id = task['metadata']['survey_id']
+            token = self._get_triage_token()
             
             headers = {"Authorization": f"Bearer {token}"}
             
@@ -801,12 +1110,16 @@ class A2ATriageService:
             
             if response.status_code == 200:
                 data = response.json()
-                return {
+                summary = {
                     'success': True,
                     'urgency_level': data.get('urgency', 'standard'),
                     'doctor_type': data.get('doctor_type', 'general practitioner'),
                     'notes': data.get('notes', 'Assessment completed')
                 }
+                # Only a finished assessment is stable enough to cache
+                if data.get('urgency') and data.get('doctor_type'):
+                    self._cache_summary(survey_id, summary)
+                return summary
             else:
                 logger.warning(f"Failed to get triage summary: {response.status_code}")
                 return {'success': False}
@@ -814,25 +1127,102 @@ class A2ATriageService:
             logger.error(f"Error getting triage summary: {e}", exc_info=True)
             return {'success': False}
     
+    def _cache_summary(self, survey_id, summary, share=True):
+        """Store a completed summary locally and, when configured, in Redis"""
+        with self._summary_cache_lock:
+            self._summary_cache[survey_id] = summary
+            if len(self._summary_cache) > SUMMARY_CACHE_SIZE:
+                self._summary_cache.popitem(last=False)
+        
+        if share and self._redis is not None:
+            try:
+                self._redis.setex(f"triage:summary:{survey_id}", SUMMARY_REDIS_TTL, _dumps(summary))
+            except Exception as e:
+                logger.warning(f"Could not share triage summary in Redis: {e}")
+    
+    def _get_shared_summary(self, survey_id):
+        """Look up a summary cached by another worker"""
+        if self._redis is None:
+            return None
+        try:
+            raw = self._redis.get(f"triage:summary:{survey_id}")
+        except Exception as e:
+            logger.warning(f"Redis summary lookup failed: {e}")
+            return None
+        return _loads(raw) if raw else None
+    
     def _get_triage_token(self):
-        """Get authentication token from external triage API with timing"""
+        """Return the cached triage token, refreshing it once it nears expiry"""
+        cache = self._triage_token_cache
+        now = time.monotonic()
+        if cache['token'] and now < cache['exp'] - TRIAGE_TOKEN_EXPIRY_MARGIN:
+            # Still valid; renew off the request path once it gets close to expiry
+            if now >= cache['exp'] - TRIAGE_TOKEN_REFRESH_AHEAD and not self._triage_token_refreshing:
+                self._triage_token_refreshing = True
+                threading.Thread(target=self._refresh_triage_token, name="triage-token-refresh", daemon=True).start()
+            return cache['token']
         
-        creds = base64.b64encode(f"{self.triage_app_id}:{self.triage_app_key}".encode()).decode()
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Basic {creds}",
-            "instance-id": self.triage_instance_id
-        }
-        payload = {"grant_type": "client_credentials"}
+        with self._triage_token_lock:
+            # Another thread may have refreshed while we waited for the lock
+            if cache['token'] and time.monotonic() < cache['exp'] - TRIAGE_TOKEN_EXPIRY_MARGIN:
+                return cache['token']
+            
+            token, expires_in = self._fetch_triage_token()
+            cache['token'] = token
+            cache['exp'] = time.monotonic() + expires_in
+            return token
+    
+    def _refresh_triage_token(self):
+        """Replace the cached triage token ahead of its expiry"""
+        cache = self._triage_token_cache
+        try:
+            with self._triage_token_lock:
+                # Skip if a blocking refresh already renewed it
+                if time.monotonic() < cache['exp'] - TRIAGE_TOKEN_REFRESH_AHEAD:
+                    return
+                token, expires_in = self._fetch_triage_token()
+                cache['token'] = token
+                cache['exp'] = time.monotonic() + expires_in
+        except Exception as e:
+            logger.warning(f"Background triage token refresh failed: {e}")
+        finally:
+            self._triage_token_refreshing = False
+    
+    def _warm_triage_token(self):
+        """Prefetch the triage token and warm the API connection in the background at startup"""
+        try:
+            self._get_triage_token()
+        except Exception as e:
+            logger.warning(f"Triage token prefetch failed, will retry on first session: {e}")
         
-        response, elapsed = self._timed_external_request(
-            'POST', self.triage_token_url, "Get OAuth Token",
-            headers=headers, json=payload, timeout=30
-        )
+        try:
+            # Any response will do; this only leaves an established socket in the pool
+            self._http.head(self.triage_base_url, timeout=5)
+        except Exception as e:
+            logger.debug(f"Triage API connection warm-up failed: {e}")
+    
+    def _fetch_triage_token(self):
+        """Get authentication token from external triage API with timing"""
+        
+        # Minting a token has no side effects, so a rate-limited request is safe to repeat
+        for attempt in range(TRIAGE_TOKEN_RATE_LIMIT_RETRIES + 1):
+            response, elapsed = self._timed_external_request(
+                'POST', self.triage_token_url, "Get OAuth Token",
+                headers=self._token_auth_headers, json=self._token_payload, timeout=30
+            )
+            if response.status_code != 429 or attempt == TRIAGE_TOKEN_RATE_LIMIT_RETRIES:
+                break
+            try:
+                delay = float(response.headers.get("Retry-After", 1))
+            except ValueError:
+                delay = 1.0  # HTTP-date form
+            delay = min(max(delay, 0.0), TRIAGE_TOKEN_MAX_RETRY_AFTER)
+            logger.warning("Token request rate limited, retrying in %.1fs", delay)
+            time.sleep(delay)
         
         if response.status_code == 200:
-            token = response.json()['access_token']
-            return token
+            data = response.json()
+            return data['access_token'], float(data.get('expires_in') or TRIAGE_TOKEN_DEFAULT_TTL)
         
         raise Exception(f"Failed to get token: {response.status_code} - {response.text}")
     
@@ -840,10 +1230,8 @@ class A2ATriageService:
     def _create_triage_survey(self, token, age, sex):
         """Create a new triage survey with timing"""
         
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
+        # Content-Type is set by requests for json= bodies
+        headers = {"Authorization": f"Bearer {token}"}
         payload = {
             "sex": sex.lower(),
             "age": {"value": age, "unit": "year"}
@@ -863,10 +1251,8 @@ class A2ATriageService:
     def _send_triage_api_message(self, token, survey_id, message):
         """Send message to external triage API with timing"""
         
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
+        # Content-Type is set by requests for json= bodies
+        headers = {"Authorization": f"Bearer {token}"}
         payload = {"user_message": message}
         
         response, elapsed = self._timed_external_request(
@@ -904,12 +1290,7 @@ class A2ATriageService:
         history_length = params.get('historyLength', 10)
         
         # Limit history if requested
-        if history_length and len(task.get('history', [])) > history_length:
-            task_copy = task.copy()
-            task_copy['history'] = task['history'][-history_length:]
-            return self._create_success_response(request_id, task_copy)
-        
-        return self._create_success_response(request_id, task)
+        return self._create_success_response(request_id, task.to_dict(history_length))
     
     def _handle_tasks_cancel(self, params, request_id):
         """Handle tasks/cancel JSON-RPC method"""
@@ -921,25 +1302,42 @@ class A2ATriageService:
         task = self.tasks[task_id]
         
         # Check if task can be cancelled
-        if task['status']['state'] in [TaskState.COMPLETED, TaskState.FAILED, TaskState.CANCELED]:
+        if task.state in _TERMINAL_STATES:
             logger.warning(f"Task {task_id} cannot be cancelled - in terminal state")
             return self._create_error_response(request_id, -32002, "Task cannot be canceled")
         
         # Cancel the task
-        task['status']['state'] = TaskState.CANCELED
-        task['status']['timestamp'] = datetime.now().isoformat()
+        task.state = TaskState.CANCELED
+        task.timestamp = _now_iso()
         
-        return self._create_success_response(request_id, task)
+        return self._create_success_response(request_id, task.to_dict(include_history=False))
 
     def run(self):
-        """Run the Flask application"""
+        """Run the Flask application.
+
+        Prefers gevent, then waitress, then Flask's threaded server. For multi-process
+        deployments use e.g. gunicorn -k gthread --threads 32 -w 2 with a factory that
+        builds A2ATriageService and returns its .app.
+        """
+        
+        if WSGIServer is not None and not self.debug:
+            logger.info(f"Serving with gevent on {self.host}:{self.port}")
+            server = WSGIServer((self.host, self.port), self.app, spawn=Pool(SERVER_MAX_GREENLETS))
+            server.serve_forever()
+            return
+        
+        if waitress_serve is not None and not self.debug:
+            logger.info(f"Serving with waitress on {self.host}:{self.port}")
+            waitress_serve(self.app, host=self.host, port=self.port, threads=SERVER_THREADS)
+            return
         
-        # Run Flask app
+        # Run Flask app; threaded so slow triage API calls don't block other requests
         self.app.run(
             host=self.host,
             port=self.port,
             debug=self.debug,
-            use_reloader=False
+            use_reloader=False,
+            threaded=True
         )
 
 def main():
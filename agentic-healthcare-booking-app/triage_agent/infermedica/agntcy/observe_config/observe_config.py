@@ -3,6 +3,23 @@ import time
 from datetime import datetime 
 from typing import Dict, Optional
 
+# Span queue for the OTLP exporters; TracerWrapper passes batch size and delay explicitly,
+# so only the queue size is taken from the environment
+OTEL_BATCH_DEFAULTS = {
+    "OTEL_BSP_MAX_QUEUE_SIZE": "8192",
+}
+
+
+def _grpc_endpoint(http_endpoint):
+    """Derive the OTLP gRPC endpoint (port 4317) from the HTTP one (port 4318)"""
+    return http_endpoint.replace(':4318', ':4317', 1)
+
+
+def _grpc_target(endpoint):
+    """Strip the URL scheme; ioa_observe only builds a gRPC exporter for scheme-less endpoints"""
+    return endpoint.split("://", 1)[-1]
+
+
 def initialize_observability(service_name):
     """Initialize observability with proper configuration for observe services"""
     try:
@@ -11,40 +28,47 @@ def initialize_observability(service_name):
         from ioa_observe.sdk.tracing.tracing import TracerWrapper
         from ioa_observe.sdk import Observe
         
-        service_name = service_name
         api_endpoint = os.getenv("OTLP_HTTP_ENDPOINT", "http://localhost:4318")
+        protocol = os.getenv("OTLP_PROTOCOL", "grpc")
+        metrics_endpoint = os.getenv("OTLP_METRICS_ENDPOINT", _grpc_endpoint(api_endpoint))
+        traces_endpoint = os.getenv(
+            "OTLP_TRACES_ENDPOINT",
+            _grpc_target(metrics_endpoint) if protocol == "grpc" else api_endpoint
+        )
+        
+        # gRPC keeps one persistent HTTP/2 channel per exporter instead of a request per export
+        os.environ.setdefault("OTEL_EXPORTER_OTLP_PROTOCOL", protocol)
+        for key, value in OTEL_BATCH_DEFAULTS.items():
+            os.environ.setdefault(key, value)
+        
+        # Read once; each wrapper gets a view of the same resource attributes
+        resource_attributes = {
+            "service.name": service_name,
+            "service.version": os.getenv("SERVICE_VERSION", "1.0.0"),
+            "environment": os.getenv("ENVIRONMENT", "development")
+        }
         
         print(f"OBSERVE_INIT: Initializing observability for service: {service_name}")
         
-        Observe.init(service_name, api_endpoint=api_endpoint)
+        Observe.init(service_name, api_endpoint=traces_endpoint)
         
         TracerWrapper.set_static_params(
-            resource_attributes={
-                "service.name": service_name,
-                "service.version": os.getenv("SERVICE_VERSION", "1.0.0"),
-                "environment": os.getenv("ENVIRONMENT", "development"),
-                "system.type": "Agent"
-            },
+            resource_attributes={**resource_attributes, "system.type": "Agent"},
             enable_content_tracing=True,
-            endpoint=api_endpoint,
+            endpoint=traces_endpoint,
             headers={}
         )
 
         LoggerWrapper.set_static_params(
-            resource_attributes={
-                "service.name": service_name,
-                "service.version": os.getenv("SERVICE_VERSION", "1.0.0"),
-                "environment": os.getenv("ENVIRONMENT", "development")
-            },
-            endpoint=api_endpoint,
+            resource_attributes=resource_attributes,
+            endpoint=traces_endpoint,
             headers={}
         )
     
-        metrics_endpoint = api_endpoint.replace('4318','4317') if "4318" in api_endpoint else api_endpoint  
         MetricsWrapper.set_static_params(
             resource_attributes={
                 "service.name": service_name,
-                "service.version": os.getenv("SERVICE_VERSION", "1.0.0")
+                "service.version": resource_attributes["service.version"]
             },
             endpoint=metrics_endpoint,
             headers={}
@@ -1,16 +1,26 @@
+import functools
 import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from identityservice.sdk import IdentityServiceSdk
 
 load_dotenv()
 
+# Identity tokens are assumed valid this long and reused until TOKEN_EXPIRY_MARGIN before that
+TOKEN_TTL = 3000
+TOKEN_EXPIRY_MARGIN = 60
+
 class TBAC:
     def __init__(self):
         self.client_api_key = os.getenv('CLIENT_AGENT_API_KEY')
         self.client_id = os.getenv('CLIENT_AGENT_ID')
         self.a2a_api_key = os.getenv('A2A_SERVICE_API_KEY')
         self.a2a_id = os.getenv('A2A_SERVICE_ID')
+        # credentials never change after startup; without all four TBAC is bypassed
+        self._tbac_enabled = bool(self.client_api_key and self.client_id and self.a2a_api_key and self.a2a_id)
 
         self.client_sdk = None
         self.a2a_sdk = None
@@ -19,10 +29,14 @@ class TBAC:
         self.client_token = None
         self.a2a_token = None
 
+        # agentic_service_id -> (token, expiry); one lock per id so concurrent callers share a mint
+        self._token_cache = {}
+        self._token_locks = {}
+
         self._setup()
 
     def _setup(self):
-        if not all([self.client_api_key, self.client_id, self.a2a_api_key, self.a2a_id]):
+        if not self._tbac_enabled:
             print("TBAC Disabled: Missing credentials:")
             return
 
@@ -33,6 +47,23 @@ class TBAC:
         except Exception as e:
             print(f"TBAC setup failed: {e}")
 
+    def _get_or_refresh(self, sdk, service_id):
+        """ return a cached access token for service_id, minting a new one near expiry """
+        lock = self._token_locks.setdefault(service_id, threading.Lock())
+        with lock:
+            cached = self._token_cache.get(service_id)
+            if cached and time.monotonic() < cached[1] - TOKEN_EXPIRY_MARGIN:
+                return cached[0]
+
+            token = sdk.access_token(agentic_service_id=service_id)
+            if token:
+                self._token_cache[service_id] = (token, time.monotonic() + TOKEN_TTL)
+            return token
+
+    def _evict_token(self, service_id):
+        """ drop a cached token that failed authorization so the next attempt mints a fresh one """
+        self._token_cache.pop(service_id, None)
+
     def authorize_client_toa2a(self):
         """ get client agent token and authorize with A2A service """
         if not self.client_sdk or not self.a2a_sdk:
@@ -41,7 +72,7 @@ class TBAC:
 
         try:
             print("TBAC: Getting client agent access token...")
-            self.client_token = self.client_sdk.access_token(agentic_service_id=self.a2a_id)
+            self.client_token = self._get_or_refresh(self.client_sdk, self.a2a_id)
 
             if not self.client_token:
                 print("TBAC FAILED: Could not get client agent token")
@@ -57,10 +88,12 @@ class TBAC:
                 return True
             else:
                 print("TBAC FAILED: client agent not authorized by A2A service")
+                self._evict_token(self.a2a_id)
                 return False
 
         except Exception as e:
             print(f"TBAC process failed: {e}")
+            self._evict_token(self.a2a_id)
             return False
 
     def authorize_a2a_to_client(self):
@@ -71,7 +104,7 @@ class TBAC:
 
         try:
             print("TBac: A2A service getting access token..")
-            self.a2a_token = self.a2a_sdk.access_token(agentic_service_id=self.client_id)
+            self.a2a_token = self._get_or_refresh(self.a2a_sdk, self.client_id)
 
             if not self.a2a_token:
                 print("TBAC FAILED: Could not get a2a service token")
@@ -87,30 +120,45 @@ class TBAC:
                 return True
             else:
                 print("TBAC FAILED: A2A service not authorized by client agent")
+                self._evict_token(self.client_id)
                 return False
 
         except Exception as e:
             print(f"TBAC A2A to client process failed: {e}")
+            self._evict_token(self.client_id)
             return False
 
     def authorize_bidirectional(self):
-        client_to_a2a_success = self.authorize_client_toa2a()
-        a2a_to_client_success = self.authorize_a2a_to_client()
+        # the two directions are independent; each worker only sets its own token/flag
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            client_to_a2a = executor.submit(self.authorize_client_toa2a)
+            a2a_to_client = executor.submit(self.authorize_a2a_to_client)
+            client_to_a2a_success = client_to_a2a.result()
+            a2a_to_client_success = a2a_to_client.result()
 
         return client_to_a2a_success and a2a_to_client_success
 
     def is_client_authorized(self):
         # check if client agent is authorized to communicate with A2A service
-        return self.client_authorized or not all([self.client_api_key, self.a2a_api_key])
+        return self.client_authorized or not self._tbac_enabled
 
     def is_a2a_authorized(self):
         # check if A2A service is authorized to communicate with client agent
-        return self.a2a_authorized or not all([self.client_api_key, self.a2a_api_key])
+        return self.a2a_authorized or not self._tbac_enabled
 
     def is_fully_authorized(self):
         # check of both directions are authorized
         return self.is_client_authorized() and self.is_a2a_authorized()
 
 
-# global TBAC instance
-tbac = TBAC()
\ No newline at end of file
+@functools.lru_cache(maxsize=1)
+def get_tbac():
+    # global TBAC instance, built on first use so importing this module stays cheap
+    return TBAC()
+
+
+def __getattr__(name):
+    # keeps `from identity_client import tbac` working without building it at import time
+    if name == "tbac":
+        return get_tbac()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
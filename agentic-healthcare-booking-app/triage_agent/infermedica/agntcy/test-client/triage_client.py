@@ -4,10 +4,52 @@ Tests the full triage API flow: token -> survey -> messages -> summary
 """
 import os
 import base64
+import hashlib
 import json
+import tempfile
 import requests
 import time
+from dataclasses import dataclass, fields
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson  # Optional: faster request/response JSON
+except ImportError:
+    orjson = None
+
+try:
+    import ijson  # Optional: parse the summary as it streams in
+except ImportError:
+    ijson = None
+
+try:
+    import httpx  # Optional: HTTP/2 multiplexing when installed with the http2 extra
+except ImportError:
+    httpx = None
+
+@dataclass(frozen=True, slots=True)
+class TriageConfig:
+    """Triage API settings, read from TRIAGE_<FIELD> environment variables"""
+    app_id: str
+    app_key: str
+    instance_id: str
+    token_url: str
+    base_url: str
+
+    @classmethod
+    def from_env(cls, optional=()):
+        """Read every field in one pass; raises EnvironmentError listing all missing variables"""
+        values, missing = {}, []
+        for f in fields(cls):
+            env_var = f"TRIAGE_{f.name.upper()}"
+            values[f.name] = os.environ.get(env_var, "")
+            if not values[f.name] and f.name not in optional:
+                missing.append(env_var)
+        if missing:
+            raise EnvironmentError(f"Missing environment variables: {missing}")
+        return cls(**values)
 
 def load_env():
     try:
@@ -16,8 +58,105 @@ def load_env():
     except:
         pass
 
+def dumps(payload):
+    return orjson.dumps(payload) if orjson is not None else json.dumps(payload).encode()
+
+def loads(body):
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+def post_json(session, url, payload, **kwargs):
+    """POST an encoded JSON body; httpx takes raw bytes as content=, requests as data="""
+    body_arg = "content" if httpx is not None and isinstance(session, httpx.Client) else "data"
+    return session.post(url, **{body_arg: dumps(payload)}, **kwargs)
+
+# Tokens are reused until this many seconds before they expire
+TOKEN_EXPIRY_MARGIN = 60
+
+def _token_cache_dir():
+    """Per-user cache directory, so other accounts on the host cannot read or plant the file"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "triage_client")
+
+def _token_cache_path(token_url, app_id, instance_id):
+    key = hashlib.sha1(f"{token_url}|{app_id}|{instance_id}".encode()).hexdigest()
+    return os.path.join(_token_cache_dir(), f"token_{key}.json")
+
+def get_cached_token(token_url, app_id, instance_id):
+    """Return a still-valid token saved by an earlier run, or None"""
+    try:
+        with open(_token_cache_path(token_url, app_id, instance_id)) as f:
+            cached = json.load(f)
+        if time.time() < cached["expires_at"] - TOKEN_EXPIRY_MARGIN:
+            return cached["token"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+def store_cached_token(token_url, app_id, instance_id, token, expires_in):
+    """Save a token for later runs (owner-readable only)"""
+    path = _token_cache_path(token_url, app_id, instance_id)
+    try:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        # Write a fresh private file and rename it over the old one; never reopen an existing path
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            os.fchmod(fd, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump({"token": token, "expires_at": time.time() + float(expires_in)}, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except (OSError, ValueError) as e:
+        print(f"   ⚠️  Could not cache token: {e}")
+
+def clear_cached_token(token_url, app_id, instance_id):
+    """Forget a cached token the API has rejected"""
+    try:
+        os.unlink(_token_cache_path(token_url, app_id, instance_id))
+    except OSError:
+        pass
+
+def token_request_headers(app_id, app_key, instance_id):
+    """Basic-auth headers for the client-credentials token request"""
+    creds = base64.b64encode(f"{app_id}:{app_key}".encode()).decode()
+    return {"Authorization": f"Basic {creds}", "instance-id": instance_id}
+
+def build_session():
+    """Keep-alive session so every call after the first reuses the TCP/TLS connection.
+
+    Uses an HTTP/2 httpx client when httpx[http2] is installed, otherwise requests.
+    Both expose the post/get/headers/json()/status_code/text calls used here.
+    """
+    if httpx is not None:
+        try:
+            transport = httpx.HTTPTransport(
+                http2=True,
+                retries=3,  # Connection failures only
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            )
+            return httpx.Client(transport=transport, timeout=30.0,
+                                headers={"Content-Type": "application/json"})
+        except ImportError:
+            pass  # h2 missing: fall back to HTTP/1.1 keep-alive
+    
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=10,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504])
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Content-Type"] = "application/json"
+    return session
+
 def test_triage_api():
     """Test complete triage API flow"""
+    with build_session() as session:
+        return _run_triage_flow(session)
+
+def _run_triage_flow(session):
     print("=" * 60)
     print("TRIAGE API CONNECTION TEST")
     print("=" * 60)
@@ -25,78 +164,59 @@ def test_triage_api():
     # Load environment variables
     load_env()
     
-    app_id = os.getenv('TRIAGE_APP_ID')
-    app_key = os.getenv('TRIAGE_APP_KEY')
-    instance_id = os.getenv('TRIAGE_INSTANCE_ID')
-    token_url = os.getenv('TRIAGE_TOKEN_URL')
-    base_url = os.getenv('TRIAGE_BASE_URL')
-    
     # Check configuration
     print("1. Checking configuration...")
-    missing = []
-    if not app_id: missing.append('TRIAGE_APP_ID')
-    if not app_key: missing.append('TRIAGE_APP_KEY')
-    if not instance_id: missing.append('TRIAGE_INSTANCE_ID')
-    if not token_url: missing.append('TRIAGE_TOKEN_URL')
-    if not base_url: missing.append('TRIAGE_BASE_URL')
-    
-    if missing:
-        print(f"   ❌ Missing environment variables: {missing}")
+    try:
+        config = TriageConfig.from_env()
+    except EnvironmentError as e:
+        print(f"   ❌ {e}")
         return False
     
-    print(f"   ✅ App ID: {app_id[:10]}...")
-    print(f"   ✅ Instance ID: {instance_id}")
-    print(f"   ✅ Token URL: {token_url}")
-    print(f"   ✅ Base URL: {base_url}")
+    print(f"   ✅ App ID: {config.app_id[:10]}...")
+    print(f"   ✅ Instance ID: {config.instance_id}")
+    print(f"   ✅ Token URL: {config.token_url}")
+    print(f"   ✅ Base URL: {config.base_url}")
     
     # Test 1: Get Token
     print("\n2. Testing token acquisition...")
-    try:
-        creds = base64.b64encode(f"{app_id}:{app_key}".encode()).decode()
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Basic {creds}",
-            "instance-id": instance_id
-        }
-        payload = {"grant_type": "client_credentials"}
-        
-        print(f"   → POST {token_url}")
-        response = requests.post(token_url, headers=headers, json=payload, timeout=30)
-        print(f"   ← Status: {response.status_code}")
-        
-        if response.status_code == 200:
-            token_data = response.json()
-            token = token_data['access_token']
-            print(f"   ✅ Token acquired: {token[:20]}...")
-            
-            # Check token expiry if available
-            if 'expires_in' in token_data:
-                print(f"   ℹ️  Token expires in: {token_data['expires_in']} seconds")
-        else:
-            print(f"   ❌ Token failed: {response.status_code}")
-            print(f"   ❌ Error: {response.text}")
+    token = get_cached_token(config.token_url, config.app_id, config.instance_id)
+    token_from_cache = token is not None
+    if token:
+        print(f"   ✅ Using cached token: {token[:20]}...")
+    else:
+        token = request_token(session, config)
+        if not token:
             return False
-            
-    except Exception as e:
-        print(f"   ❌ Token request failed: {e}")
-        return False
+    
+    # Every later call is authenticated with the bearer token
+    session.headers["Authorization"] = f"Bearer {token}"
     
     # Test 2: Create Survey
     print("\n3. Testing survey creation...")
     try:
-        headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
         payload = {
             "sex": "female",
             "age": {"value": 64, "unit": "year"}
         }
         
-        print(f"   → POST {base_url}/surveys")
+        print(f"   → POST {config.base_url}/surveys")
         print(f"   → Demographics: 64yo female")
-        response = requests.post(f"{base_url}/surveys", headers=headers, json=payload, timeout=30)
+        response = post_json(session, f"{config.base_url}/surveys", payload, timeout=30)
         print(f"   ← Status: {response.status_code}")
         
+        if response.status_code == 401 and token_from_cache:
+            # Revoked token or rotated app key: drop the cached token and fetch a fresh one once
+            print(f"   ⚠️  Cached token rejected, requesting a new one")
+            clear_cached_token(config.token_url, config.app_id, config.instance_id)
+            token = request_token(session, config)
+            if not token:
+                return False
+            session.headers["Authorization"] = f"Bearer {token}"
+            response = post_json(session, f"{config.base_url}/surveys", payload, timeout=30)
+            print(f"   ← Status: {response.status_code}")
+        
         if response.status_code == 200:
-            survey_data = response.json()
+            survey_data = loads(response.content)
             survey_id = survey_data['survey_id']
             print(f"   ✅ Survey created: {survey_id}")
         else:
@@ -111,17 +231,15 @@ def test_triage_api():
     # Test 3: Send Initial Message
     print("\n4. Testing initial message...")
     try:
-        headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
         payload = {"user_message": "I am 33 male, for the past few weeks I’ve been feeling very tired. I’m often extremely thirsty, I need to urinate much more than usual, and I’ve also lost some weight without trying."}
         
-        print(f"   → POST {base_url}/surveys/{survey_id}/messages")
+        print(f"   → POST {config.base_url}/surveys/{survey_id}/messages")
         print(f"   → Message: 'I am 33 male, for the past few weeks I’ve been feeling very tired. I’m often extremely thirsty, I need to urinate much more than usual, and I’ve also lost some weight without trying.'")
-        response = requests.post(f"{base_url}/surveys/{survey_id}/messages", 
-                               headers=headers, json=payload, timeout=30)
+        response = post_json(session, f"{config.base_url}/surveys/{survey_id}/messages", payload, timeout=30)
         print(f"   ← Status: {response.status_code}")
         
         if response.status_code == 200:
-            message_data = response.json()
+            message_data = loads(response.content)
             assistant_message = message_data.get('assistant_message', '')
             survey_state = message_data.get('survey_state', 'unknown')
             
@@ -140,112 +258,168 @@ def test_triage_api():
     
     # Test 4: Continue Conversation (simulate a few turns)
     print("\n5. Testing conversation flow...")
+    # One POST per turn: the surveys API takes a single user_message per request
+    # (no bulk endpoint), and each answer depends on the previous question
     conversation_turns = [
         "These symptoms started a few weeks ago and they have been gradually getting worse.",
-        "Loss of consciousness - no"
-        "Cold and clammy skin - no"
-        "Rapid breathing - no"
-        "Bone pain - no"    
-        "Shortness of breath - no"
-        "Pale skin - no"
-        "Yes"
-        "No"
+        "Loss of consciousness - no",
+        "Cold and clammy skin - no",
+        "Rapid breathing - no",
+        "Bone pain - no",
+        "Shortness of breath - no",
+        "Pale skin - no",
+        "Yes",
+        "No",
     ]
     
-    for i, user_message in enumerate(conversation_turns, 1):
+    run_conversation_turns(session, f"{config.base_url}/surveys/{survey_id}/messages", conversation_turns)
+    
+    # Test 5: Get Summary
+    print("\n6. Testing summary retrieval...")
+    try:
+        print(f"   → GET {config.base_url}/surveys/{survey_id}/summary")
+        streaming = ijson is not None and isinstance(session, requests.Session)
+        response = session.get(f"{config.base_url}/surveys/{survey_id}/summary", timeout=30,
+                               **({"stream": True} if streaming else {}))
+        try:
+            print(f"   ← Status: {response.status_code}")
+            
+            if response.status_code == 200:
+                print(f"   ✅ Summary retrieved successfully")
+                print(f"   ℹ️  Summary data:")
+                
+                # Pretty print the summary
+                for key, value in iter_summary_items(response, streaming):
+                    print(f"      {key}: {value}")
+                    
+            else:
+                print(f"   ⚠️  Summary failed: {response.status_code}")
+                print(f"   ⚠️  Error: {response.text}")
+        finally:
+            response.close()
+            
+    except Exception as e:
+        print(f"   ❌ Summary request failed: {e}")
+    
+    print("\n" + "=" * 60)
+    print("✅ API CONNECTION TEST COMPLETED")
+    print("=" * 60)
+    return True
+
+def request_token(session, config):
+    """Fetch a new access token and cache it; returns None after reporting a failure"""
+    try:
+        headers = token_request_headers(config.app_id, config.app_key, config.instance_id)
+        payload = {"grant_type": "client_credentials"}
+        
+        print(f"   → POST {config.token_url}")
+        response = post_json(session, config.token_url, payload, headers=headers, timeout=30)
+        print(f"   ← Status: {response.status_code}")
+        
+        if response.status_code == 200:
+            token_data = loads(response.content)
+            token = token_data['access_token']
+            print(f"   ✅ Token acquired: {token[:20]}...")
+            
+            # Check token expiry if available
+            if 'expires_in' in token_data:
+                print(f"   ℹ️  Token expires in: {token_data['expires_in']} seconds")
+                store_cached_token(config.token_url, config.app_id, config.instance_id, token, token_data['expires_in'])
+            return token
+        
+        print(f"   ❌ Token failed: {response.status_code}")
+        print(f"   ❌ Error: {response.text}")
+    except Exception as e:
+        print(f"   ❌ Token request failed: {e}")
+    return None
+
+def post_with_retry_after(session, url, payload, timeout=30):
+    """POST, retrying once after the server's Retry-After delay if it answers 429"""
+    response = post_json(session, url, payload, timeout=timeout)
+    if response.status_code == 429:
+        try:
+            delay = max(0, int(response.headers.get("Retry-After", "1")))
+        except ValueError:
+            delay = 1  # HTTP-date form; not worth parsing for a test client
+        print(f"   ⏳ Rate limited, retrying in {delay}s")
+        time.sleep(delay)
+        response = post_json(session, url, payload, timeout=timeout)
+    return response
+
+def iter_summary_items(response, streaming):
+    """Top-level (key, value) pairs of a summary, parsed off the socket when streaming"""
+    if streaming:
+        response.raw.decode_content = True  # Let urllib3 undo any gzip encoding
+        return ijson.kvitems(response.raw, "", use_float=True)
+    return loads(response.content).items()
+
+# Per-turn reply, truncated by the format spec rather than by slicing
+TURN_REPLY_TEMPLATE = "   ← State: {state}\n   ← Response: '{message:.80}...'"
+
+def run_conversation_turns(session, messages_url, turns):
+    """Send survey answers in order; returns the last survey state, or None on failure.
+
+    Each answer replies to the assistant's previous question, so the turns
+    cannot be sent concurrently.
+    """
+    survey_state = None
+    for i, user_message in enumerate(turns, 1):
         try:
             print(f"   Turn {i}: '{user_message}'")
             payload = {"user_message": user_message}
             
-            response = requests.post(f"{base_url}/surveys/{survey_id}/messages", 
-                                   headers=headers, json=payload, timeout=30)
+            response = post_with_retry_after(session, messages_url, payload)
             
             if response.status_code == 200:
-                message_data = response.json()
-                assistant_message = message_data.get('assistant_message', '')
+                message_data = loads(response.content)
                 survey_state = message_data.get('survey_state', 'unknown')
+                print(TURN_REPLY_TEMPLATE.format(state=survey_state, message=message_data.get('assistant_message') or ''))
                 
-                print(f"   ← State: {survey_state}")
-                print(f"   ← Response: '{assistant_message[:80]}...'")
-                
-                # Break if we reach certain states
+                # Stop if we reach certain states
                 if survey_state in ['post_result', 'completed']:
                     print(f"   ℹ️  Survey reached terminal state: {survey_state}")
-                    break
+                    return survey_state
                     
             else:
                 print(f"   ⚠️  Turn {i} failed: {response.status_code}")
-                break
+                return None
                 
-            # Small delay between messages
-            time.sleep(1)
-            
         except Exception as e:
             print(f"   ❌ Turn {i} failed: {e}")
-            break
-    
-    # Test 5: Get Summary
-    print("\n6. Testing summary retrieval...")
-    try:
-        print(f"   → GET {base_url}/surveys/{survey_id}/summary")
-        response = requests.get(f"{base_url}/surveys/{survey_id}/summary", 
-                              headers=headers, timeout=30)
-        print(f"   ← Status: {response.status_code}")
-        
-        if response.status_code == 200:
-            summary_data = response.json()
-            print(f"   ✅ Summary retrieved successfully")
-            print(f"   ℹ️  Summary data:")
-            
-            # Pretty print the summary
-            for key, value in summary_data.items():
-                print(f"      {key}: {value}")
-                
-        else:
-            print(f"   ⚠️  Summary failed: {response.status_code}")
-            print(f"   ⚠️  Error: {response.text}")
-            
-    except Exception as e:
-        print(f"   ❌ Summary request failed: {e}")
+            return None
     
-    print("\n" + "=" * 60)
-    print("✅ API CONNECTION TEST COMPLETED")
-    print("=" * 60)
-    return True
+    return survey_state
 
 def test_token_only():
     """Quick token-only test"""
+    with build_session() as session:
+        _run_token_check(session)
+
+def _run_token_check(session):
     print("QUICK TOKEN TEST")
     print("-" * 30)
     
     load_env()
     
-    app_id = os.getenv('TRIAGE_APP_ID')
-    app_key = os.getenv('TRIAGE_APP_KEY')
-    instance_id = os.getenv('TRIAGE_INSTANCE_ID')
-    token_url = os.getenv('TRIAGE_TOKEN_URL')
-    
-    if not all([app_id, app_key, instance_id, token_url]):
-        print("❌ Missing environment variables")
+    try:
+        config = TriageConfig.from_env(optional=("base_url",))
+    except EnvironmentError as e:
+        print(f"❌ {e}")
         return
     
     try:
-        creds = base64.b64encode(f"{app_id}:{app_key}".encode()).decode()
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Basic {creds}",
-            "instance-id": instance_id
-        }
+        headers = token_request_headers(config.app_id, config.app_key, config.instance_id)
         payload = {"grant_type": "client_credentials"}
         
-        response = requests.post(token_url, headers=headers, json=payload, timeout=10)
+        response = post_json(session, config.token_url, payload, headers=headers, timeout=10)
         
         if response.status_code == 200:
-            token_data = response.json()
+            token_data = loads(response.content)
             token = token_data['access_token']
             print(f"✅ Token: {token[:30]}...")
             if 'expires_in' in token_data:
                 print(f"⏰ Expires: {token_data['expires_in']}s")
+                store_cached_token(config.token_url, config.app_id, config.instance_id, token, token_data['expires_in'])
         else:
             print(f"❌ Failed: {response.status_code}")
             print(f"❌ Error: {response.text}")
@@ -2,11 +2,19 @@
 A2A Protocol Compliant Medical Triage Agent v2.0.0
 """
 import asyncio
+import atexit
+import copy
+import functools
+import hashlib
 import json
 import logging
 import os
 import re
+import threading
+import time
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Union
 from dataclasses import dataclass, field
@@ -14,9 +22,15 @@ from enum import Enum
 from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
 from dotenv import load_dotenv
 
+try:
+    import orjson  # Optional: faster prompt serialization and reply parsing
+except ImportError:
+    orjson = None
+
 # logging
 logging.basicConfig(
     level=logging.INFO,
@@ -24,6 +38,22 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def _dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> str:
+    """Serialize to a JSON string, using orjson when available"""
+    if orjson is not None:
+        option = (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, option=option).decode()
+    return json.dumps(obj, indent=2 if indent else None, sort_keys=sort_keys)
+
+def _loads(text: str) -> Any:
+    """Parse JSON; orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch either"""
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+# Markdown code fence around LLM JSON replies, e.g. ```json ... ```
+_FENCE_RE = re.compile(r'^```(?:json)?\n?|\n?```$')
+# Salvages the "response" field from malformed JSON replies
+_RESPONSE_RE = re.compile(r'"response"\s*:\s*"([^"]*)"')
+
 # A2A Protocol Enums and Data Classes
 class TaskState(Enum):
     SUBMITTED = "submitted"
@@ -104,28 +134,61 @@ class A2ATask:
     doctor_type: str = ""
     current_stage: str = "initial"
 
-class AdvancedMedicalIntelligence:
-    """Enhanced medical AI with dynamic questioning capabilities"""
-    
-    def __init__(self, openai_url: str, openai_api_key: str, openai_model: str = "gpt-4o"):
-        self.openai_url = openai_url
-        self.openai_api_key = openai_api_key
-        self.openai_model = openai_model
-        
-        self.headers = {
-            'Content-Type': 'application/json',
-            'Authorization': f'Bearer {openai_api_key}'
-        }
-        
-        logger.info(f"🧠 Advanced Medical AI Initialized - Model: {openai_model}")
+# Static stage system prompts; kept byte-identical across calls so the provider can
+# cache the prefix. Per-call task data goes in the user message.
+INITIAL_SYSTEM_PROMPT = """You are an expert medical triage nurse. Analyze the user's chief complaint and extract symptoms.
 
-    async def generate_dynamic_questions(self, symptoms: List[str], previous_answers: Dict[str, str]) -> List[str]:
-        """Generate intelligent follow-up questions based on symptoms and previous answers"""
-        
-        prompt = f"""You are an expert medical triage nurse with 20+ years of experience. Generate intelligent, medically relevant follow-up questions for triage assessment.
+GUIDELINES:
+- Identify medical symptoms mentioned
+- Determine if this requires medical triage
+- Extract key information
+- Be professional and empathetic
+
+REQUIRED JSON RESPONSE:
+{
+    "response": "your professional response to the patient",
+    "is_medical": true/false,
+    "symptoms_identified": ["symptom1", "symptom2"],
+    "extract": {"field_name": "value"},
+    "next_stage": "generic|complete",
+    "medical_concern": true/false
+}"""
+
+GENERIC_SYSTEM_PROMPT = """You are processing generic symptom assessment for duration and severity.
 
-CURRENT SYMPTOMS: {', '.join(symptoms)}
-PREVIOUS ANSWERS: {json.dumps(previous_answers, indent=2)}
+GUIDELINES:
+- Extract symptom duration (standardize format)
+- Extract severity score (1-10 scale)
+- Validate responses are reasonable
+
+REQUIRED JSON RESPONSE:
+{
+    "response": "your response acknowledging the information",
+    "extract": {"symptom_duration": "standardized_duration", "severity_score": number},
+    "next_stage": "specific",
+    "duration_valid": true/false,
+    "severity_valid": true/false
+}"""
+
+ASSESSMENT_SYSTEM_PROMPT = """You are conducting FINAL MEDICAL URGENCY ASSESSMENT.
+
+URGENCY LEVELS:
+- HIGH: Life-threatening, immediate 911 required
+- MEDIUM: Urgent care needed, specialty referral
+- LOW: Can see general practitioner
+
+REQUIRED JSON RESPONSE:
+{
+    "response": "your professional assessment and recommendation",
+    "urgency_level": "low|medium|high",
+    "doctor_type": "specific doctor type or 911",
+    "recommendation": "detailed medical recommendation",
+    "reasoning": "clinical reasoning for urgency level",
+    "next_stage": "complete",
+    "emergency_alert": true/false
+}"""
+
+QUESTIONS_SYSTEM_PROMPT = """You are an expert medical triage nurse with 20+ years of experience. Generate intelligent, medically relevant follow-up questions for triage assessment.
 
 TASK: Generate 2-3 specific, medically relevant follow-up questions that will help determine:
 1. Urgency level (emergency, urgent, or routine care)
@@ -141,46 +204,120 @@ GUIDELINES:
 - Focus on decision-critical information
 
 REQUIRED JSON RESPONSE:
-{{
+{
     "questions": [
         "Clear, specific medical question 1?",
         "Clear, specific medical question 2?",
         "Clear, specific medical question 3?"
     ],
     "reasoning": "Brief explanation of why these questions are important for triage"
-}}"""
+}"""
+
+class LLMCache:
+    """Exact-match LRU cache with TTL for parsed LLM results, keyed on the request payload"""
+    
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key_for(payload: Dict) -> str:
+        return hashlib.sha256(_dumps(payload, sort_keys=True).encode()).hexdigest()
+    
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        # Callers may mutate what they get back
+        return copy.deepcopy(value)
+    
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (copy.deepcopy(value), time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class AdvancedMedicalIntelligence:
+    """Enhanced medical AI with dynamic questioning capabilities"""
+    
+    def __init__(self, openai_url: str, openai_api_key: str, openai_model: str = "gpt-4o"):
+        self.openai_url = openai_url
+        self.openai_api_key = openai_api_key
+        self.openai_model = openai_model
+        
+        self.headers = {
+            'Content-Type': 'application/json',
+            'Authorization': f'Bearer {openai_api_key}'
+        }
+        
+        # Keep-alive pool shared by every call; Flask runs each async view on its own
+        # event loop, so a loop-bound aiohttp session could not be reused across requests
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        
+        # Cap in-flight OpenAI calls to the rate-limit budget; extra calls queue on the executor.
+        # A thread pool rather than asyncio.Semaphore, since each Flask request runs its own loop
+        self.max_concurrency = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="openai")
+        adapter = HTTPAdapter(pool_maxsize=self.max_concurrency)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        
+        self._prompts = {
+            "initial": INITIAL_SYSTEM_PROMPT,
+            "generic": GENERIC_SYSTEM_PROMPT,
+            "assessment": ASSESSMENT_SYSTEM_PROMPT
+        }
+        
+        # Identical prompts (same stage, data and input) skip the OpenAI round trip
+        self._cache = LLMCache()
+        
+        logger.info(f"🧠 Advanced Medical AI Initialized - Model: {openai_model}, max concurrent calls: {self.max_concurrency}")
 
+    async def generate_dynamic_questions(self, symptoms: List[str], previous_answers: Dict[str, str]) -> List[str]:
+        """Generate intelligent follow-up questions based on symptoms and previous answers"""
         try:
             payload = {
                 "messages": [
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": f"Generate dynamic triage questions for: {', '.join(symptoms)}"}
+                    {"role": "system", "content": QUESTIONS_SYSTEM_PROMPT},
+                    {"role": "user", "content": (
+                        f"CURRENT SYMPTOMS: {', '.join(symptoms)}\n"
+                        f"PREVIOUS ANSWERS: {_dumps(previous_answers, indent=True)}\n\n"
+                        f"Generate dynamic triage questions for: {', '.join(symptoms)}"
+                    )}
                 ],
                 "temperature": 0.1,
                 "max_tokens": 600
             }
             
-            response = requests.post(
-                self.openai_url,
-                headers=self.headers,
-                json=payload,
-                timeout=30
-            )
+            cache_key = LLMCache.key_for(payload)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
+            response = await self._post_chat(payload)
             
             if response.status_code == 200:
                 response_json = response.json()
                 ai_content = response_json['choices'][0]['message']['content']
                 
                 # Parse JSON response
-                content = ai_content.strip()
-                if content.startswith('```json'):
-                    content = content[7:]
-                if content.endswith('```'):
-                    content = content[:-3]
-                content = content.strip()
+                content = _FENCE_RE.sub('', ai_content.strip()).strip()
                 
-                parsed = json.loads(content)
-                return parsed.get("questions", [])
+                parsed = _loads(content)
+                questions = parsed.get("questions", [])
+                if questions:
+                    self._cache.set(cache_key, questions)
+                return questions
             else:
                 logger.error(f"Failed to generate questions: {response.status_code}")
                 return self._fallback_questions(symptoms)
@@ -189,6 +326,17 @@ REQUIRED JSON RESPONSE:
             logger.error(f"Exception generating questions: {e}")
             return self._fallback_questions(symptoms)
 
+    async def _post_chat(self, payload: Dict) -> requests.Response:
+        """POST a chat completion off the event loop so concurrent triage tasks overlap"""
+        loop = asyncio.get_running_loop()
+        post = functools.partial(self._session.post, self.openai_url, json=payload, timeout=30)
+        return await loop.run_in_executor(self._executor, post)
+
+    def close(self):
+        """Release pooled connections and worker threads"""
+        self._executor.shutdown(wait=False)
+        self._session.close()
+
     def _fallback_questions(self, symptoms: List[str]) -> List[str]:
         """Fallback questions when AI generation fails"""
         if "chest pain" in ' '.join(symptoms).lower():
@@ -213,29 +361,33 @@ REQUIRED JSON RESPONSE:
     async def process_triage_assessment(self, task: A2ATask, user_input: str, context: str = "") -> Dict:
         """Process user input for medical triage with enhanced AI"""
         
-        prompt = self._construct_triage_prompt(task, user_input, context)
-        
         try:
             payload = {
                 "messages": [
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": user_input}
+                    {"role": "system", "content": self._static_system_prompt(task.current_stage)},
+                    {"role": "user", "content": self._construct_triage_input(task, user_input, context)}
                 ],
                 "temperature": 0.1,
                 "max_tokens": 800
             }
             
-            response = requests.post(
-                self.openai_url,
-                headers=self.headers,
-                json=payload,
-                timeout=30
-            )
+            cache_key = LLMCache.key_for(payload)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
+            response = await self._post_chat(payload)
             
             if response.status_code == 200:
                 response_json = response.json()
                 ai_content = response_json['choices'][0]['message']['content']
-                return self._parse_triage_response(ai_content)
+                try:
+                    parsed = self._load_triage_json(ai_content)
+                except json.JSONDecodeError as e:
+                    # Recovered/fallback results are never cached
+                    return self._recover_triage_response(ai_content, e)
+                self._cache.set(cache_key, parsed)
+                return parsed
             else:
                 logger.error(f"Triage assessment failed: {response.status_code}")
                 return self._create_fallback_response(task.current_stage)
@@ -244,8 +396,15 @@ REQUIRED JSON RESPONSE:
             logger.error(f"Triage assessment exception: {e}")
             return self._create_fallback_response(task.current_stage)
 
-    def _construct_triage_prompt(self, task: A2ATask, user_input: str, context: str) -> str:
-        """Construct stage-specific prompts for triage assessment"""
+    def _static_system_prompt(self, stage: str) -> str:
+        """Stage instructions, identical on every call for the same stage"""
+        prompt = self._prompts.get(stage)
+        if prompt is not None:
+            return prompt
+        return f"""Process this medical interaction professionally. Current stage: {stage}"""
+
+    def _construct_triage_input(self, task: A2ATask, user_input: str, context: str) -> str:
+        """Construct the per-call user message: task data, optional context, then the patient's words"""
         
         task_data = {
             "current_stage": task.current_stage,
@@ -257,96 +416,32 @@ REQUIRED JSON RESPONSE:
                            for msg in task.history[-3:]]
         }
         
-        if task.current_stage == "initial":
-            return f"""You are an expert medical triage nurse. Analyze the user's chief complaint and extract symptoms.
-
-TASK DATA: {json.dumps(task_data, indent=2)}
-CONTEXT: {context}
-
-GUIDELINES:
-- Identify medical symptoms mentioned
-- Determine if this requires medical triage
-- Extract key information
-- Be professional and empathetic
+        message = f"TASK DATA: {_dumps(task_data, indent=True)}\n"
+        if context:
+            message += f"CONTEXT: {context}\n"
+        return f"{message}\nUSER INPUT: {user_input}"
 
-REQUIRED JSON RESPONSE:
-{{
-    "response": "your professional response to the patient",
-    "is_medical": true/false,
-    "symptoms_identified": ["symptom1", "symptom2"],
-    "extract": {{"field_name": "value"}},
-    "next_stage": "generic|complete",
-    "medical_concern": true/false
-}}"""
+    def _load_triage_json(self, response_text: str) -> Dict:
+        """Parse a well-formed AI response; raises json.JSONDecodeError otherwise"""
+        content = _FENCE_RE.sub('', response_text.strip()).strip()
         
-        elif task.current_stage == "generic":
-            return f"""You are processing generic symptom assessment for duration and severity.
-
-TASK DATA: {json.dumps(task_data, indent=2)}
-
-GUIDELINES:
-- Extract symptom duration (standardize format)
-- Extract severity score (1-10 scale)
-- Validate responses are reasonable
-
-REQUIRED JSON RESPONSE:
-{{
-    "response": "your response acknowledging the information",
-    "extract": {{"symptom_duration": "standardized_duration", "severity_score": number}},
-    "next_stage": "specific",
-    "duration_valid": true/false,
-    "severity_valid": true/false
-}}"""
-        
-        elif task.current_stage == "assessment":
-            return f"""You are conducting FINAL MEDICAL URGENCY ASSESSMENT.
-
-TASK DATA: {json.dumps(task_data, indent=2)}
-
-URGENCY LEVELS:
-- HIGH: Life-threatening, immediate 911 required
-- MEDIUM: Urgent care needed, specialty referral
-- LOW: Can see general practitioner
-
-REQUIRED JSON RESPONSE:
-{{
-    "response": "your professional assessment and recommendation",
-    "urgency_level": "low|medium|high",
-    "doctor_type": "specific doctor type or 911",
-    "recommendation": "detailed medical recommendation",
-    "reasoning": "clinical reasoning for urgency level",
-    "next_stage": "complete",
-    "emergency_alert": true/false
-}}"""
+        parsed = _loads(content)
+        if "response" not in parsed:
+            parsed["response"] = "I understand. Please continue."
         
-        return f"""Process this medical interaction professionally. Current stage: {task.current_stage}"""
+        return parsed
 
-    def _parse_triage_response(self, response_text: str) -> Dict:
-        """Parse AI response with error recovery"""
-        try:
-            content = response_text.strip()
-            if content.startswith('```json'):
-                content = content[7:]
-            if content.endswith('```'):
-                content = content[:-3]
-            content = content.strip()
-            
-            parsed = json.loads(content)
-            if "response" not in parsed:
-                parsed["response"] = "I understand. Please continue."
-            
-            return parsed
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON parse error: {e}")
-            response_match = re.search(r'"response":\s*"([^"]*)"', response_text)
-            if response_match:
-                return {
-                    "response": response_match.group(1),
-                    "extract": {},
-                    "next_stage": "generic"
-                }
-            return self._create_fallback_response("generic")
+    def _recover_triage_response(self, response_text: str, error: json.JSONDecodeError) -> Dict:
+        """Salvage the response text from malformed AI output, or fall back"""
+        logger.error(f"JSON parse error: {error}")
+        response_match = _RESPONSE_RE.search(response_text)
+        if response_match:
+            return {
+                "response": response_match.group(1),
+                "extract": {},
+                "next_stage": "generic"
+            }
+        return self._create_fallback_response("generic")
 
     def _create_fallback_response(self, current_stage: str) -> Dict:
         """Create fallback responses for different stages"""
@@ -770,7 +865,7 @@ CLINICAL DATA FOR ASSESSMENT:
 - Symptoms: {', '.join(task.symptoms)}
 - Duration: {task.symptom_duration}
 - Severity: {task.severity_score}/10
-- Clinical Answers: {json.dumps(task.answers, indent=2)}
+- Clinical Answers: {_dumps(task.answers, indent=True)}
 
 Determine urgency level and appropriate medical recommendation.
 """
@@ -1071,6 +1166,8 @@ class A2ATriageServer:
         debug = self.config.get('debug', False)
         
         logger.info(f"🚀 Starting A2A Medical Triage Server on {host}:{port}")
+        # Release the OpenAI connection pool and worker threads when the process exits
+        atexit.register(self.agent.medical_ai.close)
         self.app.run(host=host, port=port, debug=debug)
 
 def load_config():